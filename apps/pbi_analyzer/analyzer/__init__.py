@@ -1 +1,4 @@
 """Power BI analyzer package for Streamlit demo app."""
+
+# Bump whenever analysis output changes so cached results are recomputed.
+__version__ = "0.6.0"
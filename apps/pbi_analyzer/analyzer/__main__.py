@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import sys
+from typing import List, Optional
+
+from .batch import run_batch
+from .bench import BenchParams, compare_to_baseline, run_benchmarks
+from .corpus_index import CorpusIndex, index_report_folders
+from .diff import BUDGET_METRICS, build_markdown_diff, diff_analyses, diff_to_dict, load_analysis
+from .github_stub import run_actions_check
+from .instrument import PROFILE_ENV
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m analyzer", description="Headless Power BI analyzer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="Analyze many PBIX files into report-query-logic outputs.")
+    batch.add_argument("inputs", nargs="+", help="PBIX files or folders to scan recursively.")
+    batch.add_argument(
+        "--out",
+        default="out/powerbi-examples-all/report-query-logic",
+        help="Output folder (one sub-folder per report plus summary.json).",
+    )
+    batch.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    batch.add_argument(
+        "--artifacts-root",
+        default=None,
+        help="Folder holding extracted artifacts as <artifacts-root>/<report folder>/ for DAX enrichment.",
+    )
+    batch.add_argument("--force", action="store_true", help="Re-analyze reports even when outputs are up to date.")
+    batch.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the analysis cache (no incremental re-analysis of changed reports).",
+    )
+    batch.add_argument(
+        "--index",
+        nargs="?",
+        const="",
+        default=None,
+        help="Also update the corpus usage index (optionally at this path; default $PBI_ANALYZER_INDEX or the cache dir).",
+    )
+    batch.add_argument(
+        "--compact-refs",
+        action="store_true",
+        help="Write one semantic reference per distinct field and page, with a \"count\" of its occurrences.",
+    )
+    batch.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse the visual configs of each large report in a process pool of this size "
+        "(for a few very large reports; combine with a small --workers).",
+    )
+    batch.add_argument(
+        "--profile",
+        nargs="?",
+        const="time",
+        default=os.environ.get(PROFILE_ENV),
+        choices=["time", "memory"],
+        help="Log per-report stage timings (and tracemalloc peaks with 'memory') as JSON lines on stderr.",
+    )
+
+    index = sub.add_parser("index", help="Add report-query-logic outputs to the corpus usage index.")
+    index.add_argument("folders", nargs="+", help="Report output folders, or parents with one sub-folder per report.")
+    index.add_argument("--db", default=None, help="Index file (default: $PBI_ANALYZER_INDEX or the cache dir).")
+    index.add_argument("--force", action="store_true", help="Re-index reports even when unchanged.")
+
+    search = sub.add_parser("search", help="List the reports, pages and visuals that use a field.")
+    search.add_argument("ref", help='queryRef such as "SorDetail.Calc Index to Budget Bookings", or any substring.')
+    search.add_argument("--db", default=None, help="Index file (default: $PBI_ANALYZER_INDEX or the cache dir).")
+
+    diff = sub.add_parser(
+        "diff", help="Compare two reports (PBIX, analysis JSON, cached .pbia or report-query-logic folder)."
+    )
+    diff.add_argument("before", help="Baseline report (PBIX, analysis .json, cached .pbia or output folder).")
+    diff.add_argument("after", help="Changed report (same forms as before).")
+    diff.add_argument("--before-artifacts", default=None, help="Artifact folder or .bim for the baseline.")
+    diff.add_argument("--after-artifacts", default=None, help="Artifact folder or .bim for the changed report.")
+    diff.add_argument("--format", choices=("markdown", "json"), default="markdown", help="Output printed to stdout.")
+    diff.add_argument("--json", dest="json_path", default=None, help="Also write the JSON diff to this file.")
+    diff.add_argument("--markdown", dest="markdown_path", default=None, help="Also write the Markdown diff to this file.")
+    diff.add_argument(
+        "--budget", type=int, default=None, help="Exit 1 if a section that got worse ends above this value."
+    )
+    diff.add_argument("--budget-metric", choices=BUDGET_METRICS, default="complexity_score")
+
+    bench = sub.add_parser("bench", help="Time analyzer stages on synthetic PBIX and artifact inputs.")
+    defaults = BenchParams()
+    bench.add_argument("--sections", type=int, default=defaults.sections)
+    bench.add_argument("--visuals", type=int, default=defaults.visuals_per_section, help="Visuals per section.")
+    bench.add_argument("--projections", type=int, default=defaults.projections, help="Fields per visual.")
+    bench.add_argument("--depth", type=int, default=defaults.query_depth, help="Filter nesting depth per query.")
+    bench.add_argument("--tables", type=int, default=defaults.tables)
+    bench.add_argument("--dax-files", type=int, default=defaults.dax_files)
+    bench.add_argument("--seed", type=int, default=defaults.seed)
+    bench.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best is reported.")
+    bench.add_argument("--no-tracemalloc", action="store_true", help="Skip the extra traced run per stage.")
+    bench.add_argument("--out", default=None, help="Write results JSON here.")
+    bench.add_argument("--baseline", default=None, help="Results JSON to compare against.")
+    bench.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%) before failing."
+    )
+
+    actions_check = sub.add_parser(
+        "actions-check", help="Exercise the GitHub run-artifact download against a local stub server (offline)."
+    )
+    actions_check.add_argument("--measures", type=int, default=200, help=".dax files in the stub archive.")
+    return parser
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    if args.profile:
+        logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    result = run_batch(
+        args.inputs,
+        args.out,
+        workers=args.workers,
+        artifacts_root=args.artifacts_root,
+        force=args.force,
+        index_path=args.index,
+        use_cache=not args.no_cache,
+        profile=args.profile,
+        compact_refs=args.compact_refs,
+        parse_workers=args.parse_workers,
+    )
+    for path, error in sorted(result.failures.items()):
+        print(f"FAILED {path}: {error}", file=sys.stderr)
+    print(result.throughput_line())
+    return 1 if result.failures else 0
+
+
+def _run_index(args: argparse.Namespace) -> int:
+    with CorpusIndex(args.db) as index:
+        updated, unchanged = index_report_folders(index, args.folders, force=args.force)
+        stats = index.stats()
+    print(f"updated={updated} unchanged={unchanged} reports={stats['reports']} postings={stats['postings']}")
+    return 0
+
+
+def _run_search(args: argparse.Namespace) -> int:
+    with CorpusIndex(args.db) as index:
+        postings = index.lookup_ref(args.ref)
+        if postings:
+            for p in postings:
+                print(f"{p.report}\t{p.section}\tvisual {p.visual}\t{p.type} {p.table}.{p.name}")
+            return 0
+        matches = index.search(args.ref)
+    for kind, table, name, reports, visuals in matches:
+        print(f"{kind} {table}.{name}\treports={reports}\tvisuals={visuals}")
+    return 0 if matches else 1
+
+
+def _run_diff(args: argparse.Namespace) -> int:
+    before = load_analysis(args.before, args.before_artifacts)
+    after = load_analysis(args.after, args.after_artifacts)
+    result = diff_analyses(before, after)
+    markdown = build_markdown_diff(result, budget=args.budget, metric=args.budget_metric)
+    payload = diff_to_dict(result)
+    if args.budget is not None:
+        payload["budget"] = {
+            "metric": args.budget_metric,
+            "limit": args.budget,
+            "violations": [d.section for d in result.budget_violations(args.budget, args.budget_metric)],
+        }
+    if args.json_path:
+        pathlib.Path(args.json_path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    if args.markdown_path:
+        pathlib.Path(args.markdown_path).write_text(markdown, encoding="utf-8")
+    print(json.dumps(payload, indent=2) if args.format == "json" else markdown)
+    if args.budget is not None and result.budget_violations(args.budget, args.budget_metric):
+        return 1
+    return 0
+
+
+def _run_bench(args: argparse.Namespace) -> int:
+    params = BenchParams(
+        sections=args.sections,
+        visuals_per_section=args.visuals,
+        projections=args.projections,
+        query_depth=args.depth,
+        tables=args.tables,
+        dax_files=args.dax_files,
+        seed=args.seed,
+    )
+    results = run_benchmarks(params, repeat=args.repeat, trace_memory=not args.no_tracemalloc)
+    for stage, data in results["stages"].items():
+        peak = data.get("tracemalloc_peak_bytes")
+        peak_text = f" peak={peak / 1_000_000:.1f}MB" if peak is not None else ""
+        print(f"{stage}: {data['seconds']:.4f}s{peak_text}")
+    if results["peak_rss_bytes"]:
+        print(f"peak_rss={results['peak_rss_bytes'] / 1_000_000:.1f}MB")
+    if args.out:
+        pathlib.Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text(encoding="utf-8"))
+        if baseline.get("params") != results["params"]:
+            print("WARNING baseline was recorded with different parameters", file=sys.stderr)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+def _run_actions_check(args: argparse.Namespace) -> int:
+    try:
+        report = run_actions_check(args.measures)
+    except RuntimeError as exc:
+        print(f"FAILED {exc}", file=sys.stderr)
+        return 1
+    for failure in report["failures"]:
+        print(f"FAILED {failure}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failures"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    if args.command == "batch":
+        return _run_batch(args)
+    if args.command == "index":
+        return _run_index(args)
+    if args.command == "search":
+        return _run_search(args)
+    if args.command == "diff":
+        return _run_diff(args)
+    if args.command == "bench":
+        return _run_bench(args)
+    if args.command == "actions-check":
+        return _run_actions_check(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .columnar import RefTable, VisualQueryStore
+from .models import MeasureDetail, ReportAnalysis, SectionSummary
+# COMPLEXITY_TOKENS is re-exported for existing importers.
+from .scoring import COMPLEXITY_TOKENS, ComplexityScorer, default_scorer
+
+
+def score_ref(name: str) -> Tuple[int, List[str]]:
+    return default_scorer().score(name)
+
+
+def query_refs_from_projections(projections: dict) -> List[str]:
+    refs: List[str] = []
+    for _, values in projections.items():
+        if not isinstance(values, list):
+            continue
+        for item in values:
+            if isinstance(item, dict) and "queryRef" in item:
+                refs.append(str(item["queryRef"]))
+    return refs
+
+
+class ReportAggregator:
+    """Single-pass accumulator shared by the PBIX and precomputed loaders.
+
+    Feed it visuals (with their projections) and semantic references as they
+    are discovered; `build` derives usage counters, section sets, scores and
+    unique-key counts without another pass over the inputs.
+    """
+
+    def __init__(self, scorer: Optional[ComplexityScorer] = None, compact_refs: bool = False) -> None:
+        self.scorer = scorer or default_scorer()
+        # Compact mode keeps one counted row per distinct (section, type, table, name).
+        self.compact_refs = compact_refs
+        self._ref_rows: Dict[Tuple[str, str, Optional[str], Optional[str]], int] = {}
+        self.visual_queries = VisualQueryStore()
+        self.semantic_references = RefTable()
+        self._ref_usage: Counter = Counter()
+        self._ref_sections: Dict[str, Set[str]] = defaultdict(set)
+        self._section_refs: Dict[str, Set[str]] = defaultdict(set)
+        self._measure_keys: Set[Tuple[str, str]] = set()
+        self._column_keys: Set[Tuple[str, str]] = set()
+        self._scores: Dict[str, Tuple[int, List[str]]] = {}
+
+    def add_query_ref(self, section: str, ref: str) -> None:
+        self._ref_usage[ref] += 1
+        self._ref_sections[ref].add(section)
+        self._section_refs[section].add(ref)
+
+    def add_visual(self, visual: dict) -> None:
+        section = visual.get("section", "Unknown")
+        projections = visual.get("projections", {})
+        for ref in query_refs_from_projections(projections):
+            self.add_query_ref(section, ref)
+        self.visual_queries.append(visual)
+
+    def add_encoded_visual(self, section: str, payload: bytes, query_refs: List[str]) -> None:
+        """`add_visual` for a visual encoded elsewhere, with its projection queryRefs already extracted."""
+        for ref in query_refs:
+            self.add_query_ref(section, ref)
+        self.visual_queries.append_encoded(section, payload)
+
+    def add_stored_visual(self, store: VisualQueryStore, index: int, refs: RefTable, start: int, stop: int) -> None:
+        """Reuse a visual and its refs from an earlier analysis without re-encoding them."""
+        visual = store[index]
+        section = visual.get("section", "Unknown")
+        for ref in query_refs_from_projections(visual.get("projections", {})):
+            self.add_query_ref(section, ref)
+        self.visual_queries.append_from(store, index)
+        get = refs.pool.get
+        for i in range(start, stop):
+            ref_type = get(refs.types[i])
+            if ref_type in ("Measure", "Column"):
+                key = (get(refs.tables[i]) or "Unknown", get(refs.names[i]) or "Unknown")
+                (self._measure_keys if ref_type == "Measure" else self._column_keys).add(key)
+        self.semantic_references.extend_from(refs, start, stop)
+
+    def add_semantic_ref(self, ref: dict) -> None:
+        ref_type = ref.get("type")
+        if ref_type == "Measure":
+            self._measure_keys.add((ref.get("table") or "Unknown", ref.get("name") or "Unknown"))
+        elif ref_type == "Column":
+            self._column_keys.add((ref.get("table") or "Unknown", ref.get("name") or "Unknown"))
+        self.semantic_references.append(ref)
+
+    def add_semantic_fields(self, ref_type: str, table: Optional[str], name: Optional[str], section: str) -> None:
+        """Same as `add_semantic_ref` for a flat ref given as parts, with no dict allocated."""
+        key = (table or "Unknown", name or "Unknown")
+        if ref_type == "Measure":
+            self._measure_keys.add(key)
+        elif ref_type == "Column":
+            self._column_keys.add(key)
+        if not self.compact_refs:
+            self.semantic_references.append_fields(ref_type, table, name, section)
+            return
+        row_key = (section, ref_type, table, name)
+        row = self._ref_rows.get(row_key)
+        if row is None:
+            self._ref_rows[row_key] = self.semantic_references.append_fields(ref_type, table, name, section, True)
+        else:
+            self.semantic_references.add_occurrence(row)
+
+    def score(self, ref: str) -> Tuple[int, List[str]]:
+        cached = self._scores.get(ref)
+        if cached is None:
+            cached = self._scores[ref] = self.scorer.score(ref)
+        return cached
+
+    def build(self, report_name: str, source_mode: str) -> ReportAnalysis:
+        # Score every distinct ref in one batch scan before building rows.
+        pending = [ref for ref in self._ref_usage if ref not in self._scores]
+        self._scores.update(zip(pending, self.scorer.score_many(pending)))
+
+        measures: Dict[str, MeasureDetail] = {}
+        for ref, count in self._ref_usage.items():
+            score, matched = self.score(ref)
+            measures[ref] = MeasureDetail(
+                name=ref,
+                source="query_ref",
+                usage_count=count,
+                sections=sorted(self._ref_sections[ref]),
+                matched_tokens=list(matched),
+                complexity_score=score,
+            )
+
+        section_summaries: List[SectionSummary] = []
+        for section, refs in self._section_refs.items():
+            section_summaries.append(
+                SectionSummary(
+                    section=section,
+                    unique_refs=len(refs),
+                    complexity_score=sum(self.score(r)[0] for r in refs),
+                )
+            )
+        section_summaries.sort(key=lambda s: (-s.complexity_score, -s.unique_refs, s.section.lower()))
+
+        return ReportAnalysis(
+            report_name=report_name,
+            source_mode=source_mode,
+            total_queries=len(self.visual_queries),
+            total_refs=self.semantic_references.occurrences(),
+            unique_measures=len(self._measure_keys),
+            unique_columns=len(self._column_keys),
+            measures=measures,
+            section_summaries=section_summaries,
+            visual_queries=self.visual_queries,
+            semantic_references=self.semantic_references,
+            has_dax_formulas=False,
+            has_bim=False,
+        )
@@ -1,54 +1,157 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import pathlib
-import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from dataclasses import dataclass
-from typing import Dict
+from typing import IO, Dict, List, Optional, Tuple, Union
 
+from .bim import parse_bim
+from .instrument import NULL_PROFILER, AnyProfiler, active
 from .models import MeasureDetail
 
 
+# Subtrees of a pbi-tools extract that never contain model objects.
+PRUNED_DIRS = {"report", "staticresources", "customvisuals", ".git", "__pycache__"}
+DEFAULT_READ_WORKERS = 16
+PARALLEL_READ_MIN_FILES = 32
+MANIFEST_VERSION = 1
+
+
 @dataclass
 class ArtifactParseResult:
     measures: Dict[str, MeasureDetail]
     has_bim: bool
-    bim_location: str  # none | inside_folder | sibling_file
+    bim_location: str  # none | inside_folder | sibling_file | bim_file
     dax_count: int
 
 
-def _collect_from_folder(base: pathlib.Path) -> ArtifactParseResult:
-    measures: Dict[str, MeasureDetail] = {}
-    has_bim = False
-    bim_location = "none"
-    for path in base.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() == ".bim":
-            has_bim = True
-            bim_location = "inside_folder"
-        if path.suffix.lower() != ".dax":
-            continue
+def _decode_dax(raw: bytes) -> str:
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin1")
+    # Same newline handling as Path.read_text so zip and folder scans agree.
+    return text.replace("\r\n", "\n").replace("\r", "\n").strip()
+
+
+def _dax_measure(name: str, formula: str) -> MeasureDetail:
+    return MeasureDetail(
+        name=name,
+        source="dax",
+        dax_formula=formula,
+        usage_count=0,
+        sections=[],
+        matched_tokens=[],
+        complexity_score=0,
+    )
+
+
+def _scan_folder(base: str) -> Tuple[List[Tuple[str, str, int, int]], List[str]]:
+    """Walk `base` with os.scandir, returning (.dax entries, .bim paths).
+
+    Each entry is (relative parent, stem, mtime_ns, size). Report/StaticResources
+    style subtrees never hold model objects and are pruned, except directly
+    under a `tables` folder where they are ordinary table names.
+    """
+    dax_entries: List[Tuple[str, str, int, int]] = []
+    bim_paths: List[str] = []
+    stack = [("", base, "")]
+    while stack:
+        rel_dir, abs_dir, dir_name = stack.pop()
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if entry.name.lower() in PRUNED_DIRS and dir_name.lower() != "tables":
+                        continue
+                    stack.append((os.path.join(rel_dir, entry.name), entry.path, entry.name))
+                    continue
+                stem, suffix = os.path.splitext(entry.name)
+                suffix = suffix.lower()
+                if suffix == ".bim" and entry.is_file():
+                    bim_paths.append(entry.path)
+                elif suffix == ".dax" and entry.is_file():
+                    st = entry.stat()
+                    dax_entries.append((rel_dir or ".", stem, st.st_mtime_ns, st.st_size))
+    dax_entries.sort()
+    bim_paths.sort()
+    return dax_entries, bim_paths
+
 
-        key = path.stem
+def _read_dax_file(path: str) -> str:
+    with open(path, "rb") as fh:
+        return _decode_dax(fh.read())
+
+
+def _default_manifest_path(base: pathlib.Path) -> pathlib.Path:
+    from .cache import default_cache_dir
+
+    digest = hashlib.sha1(str(base.resolve()).encode("utf-8")).hexdigest()
+    return default_cache_dir() / "manifests" / f"{digest}.json"
+
+
+def _load_manifest(path: pathlib.Path) -> Dict[str, list]:
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if payload.get("version") != MANIFEST_VERSION:
+        return {}
+    return payload.get("files", {})
+
+
+def _save_manifest(path: pathlib.Path, files: Dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "files": files}), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _collect_from_folder(
+    base: pathlib.Path,
+    manifest_path: Optional[pathlib.Path] = None,
+    workers: Optional[int] = None,
+    profiler: AnyProfiler = NULL_PROFILER,
+) -> ArtifactParseResult:
+    with profiler.span("artifact_scan"):
+        dax_entries, bim_paths = _scan_folder(str(base))
+    has_bim = bool(bim_paths)
+    bim_location = "inside_folder" if has_bim else "none"
+
+    previous = _load_manifest(manifest_path) if manifest_path is not None else {}
+    files: Dict[str, list] = {}
+    names: List[str] = []
+    to_read: List[Tuple[str, str, int, int]] = []
+    for rel_parent, stem, mtime_ns, size in dax_entries:
         # Preserve folder context to avoid collisions for common names like "Total"
-        rel_parent = str(path.parent.relative_to(base))
-        name = f"{rel_parent}/{key}" if rel_parent != "." else key
-        try:
-            formula = path.read_text(encoding="utf-8").strip()
-        except UnicodeDecodeError:
-            formula = path.read_text(encoding="latin1").strip()
-
-        measures[name] = MeasureDetail(
-            name=name,
-            source="dax",
-            dax_formula=formula,
-            usage_count=0,
-            sections=[],
-            matched_tokens=[],
-            complexity_score=0,
-        )
+        name = f"{rel_parent}/{stem}" if rel_parent != "." else stem
+        names.append(name)
+        cached = previous.get(name)
+        if cached is not None and cached[0] == mtime_ns and cached[1] == size:
+            files[name] = cached
+        else:
+            to_read.append((name, os.path.join(base, rel_parent, stem + ".dax"), mtime_ns, size))
+
+    read_paths = [path for _, path, _, _ in to_read]
+    profiler.count("dax_files_read", len(read_paths))
+    profiler.count("dax_files_from_manifest", len(names) - len(read_paths))
+    with profiler.span("artifact_read"):
+        if len(read_paths) >= PARALLEL_READ_MIN_FILES:
+            with ThreadPoolExecutor(max_workers=workers or DEFAULT_READ_WORKERS) as pool:
+                formulas = list(pool.map(_read_dax_file, read_paths))
+        else:
+            formulas = [_read_dax_file(path) for path in read_paths]
+    for (name, _, mtime_ns, size), formula in zip(to_read, formulas):
+        files[name] = [mtime_ns, size, formula]
+
+    if manifest_path is not None:
+        _save_manifest(manifest_path, files)
+
+    measures = {name: _dax_measure(name, files[name][2]) for name in names}
 
     # pbi-tools generate-bim commonly writes "<foldername>.bim" to the parent folder
     # (for example selecting ".../workflow-extract/legacy" creates ".../workflow-extract/legacy.bim").
@@ -57,6 +160,13 @@ def _collect_from_folder(base: pathlib.Path) -> ArtifactParseResult:
         if sibling_bim.exists() and sibling_bim.is_file():
             has_bim = True
             bim_location = "sibling_file"
+            bim_paths = [str(sibling_bim)]
+
+    # Without exploded .dax files, the model .bim is the DAX source.
+    if not measures and bim_paths:
+        with profiler.span("bim_parse"), open(bim_paths[0], "rb") as fh:
+            measures = parse_bim(fh)
+        profiler.count("bim_objects", len(measures))
 
     return ArtifactParseResult(
         measures=measures,
@@ -66,13 +176,93 @@ def _collect_from_folder(base: pathlib.Path) -> ArtifactParseResult:
     )
 
 
-def parse_artifact_zip(artifact_bytes: bytes) -> ArtifactParseResult:
-    with tempfile.TemporaryDirectory() as td:
-        root = pathlib.Path(td)
-        with zipfile.ZipFile(BytesIO(artifact_bytes), "r") as zf:
-            zf.extractall(root)
-        return _collect_from_folder(root)
+def _collect_from_zip(zf: zipfile.ZipFile, profiler: AnyProfiler = NULL_PROFILER) -> ArtifactParseResult:
+    measures: Dict[str, MeasureDetail] = {}
+    bim_members: List[zipfile.ZipInfo] = []
+    with profiler.span("artifact_extract"):
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            path = pathlib.PurePosixPath(info.filename)
+            suffix = path.suffix.lower()
+            if suffix == ".bim":
+                bim_members.append(info)
+            if suffix != ".dax":
+                continue
+            rel_parent = str(path.parent)
+            name = f"{rel_parent}/{path.stem}" if rel_parent != "." else path.stem
+            measures[name] = _dax_measure(name, _decode_dax(zf.read(info)))
+    profiler.count("dax_files_read", len(measures))
+
+    if not measures and bim_members:
+        with profiler.span("bim_parse"), zf.open(bim_members[0]) as fh:
+            measures = parse_bim(fh)
+        profiler.count("bim_objects", len(measures))
+
+    return ArtifactParseResult(
+        measures=measures,
+        has_bim=bool(bim_members),
+        bim_location="inside_folder" if bim_members else "none",
+        dax_count=len(measures),
+    )
+
+
+def parse_artifact_zip(
+    artifact: Union[bytes, IO[bytes]], profiler: Optional[AnyProfiler] = None
+) -> ArtifactParseResult:
+    # Members are read straight from the archive; nothing is extracted to disk.
+    source = BytesIO(artifact) if isinstance(artifact, (bytes, bytearray)) else artifact
+    with zipfile.ZipFile(source, "r") as zf:
+        return _collect_from_zip(zf, active(profiler))
 
 
-def parse_artifact_folder(folder_path: str) -> ArtifactParseResult:
-    return _collect_from_folder(pathlib.Path(folder_path))
+def parse_artifact_folder(
+    folder_path: str,
+    incremental: bool = False,
+    manifest_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    profiler: Optional[AnyProfiler] = None,
+) -> ArtifactParseResult:
+    """Scan an extracted artifact folder for `.dax` files and a `.bim`.
+
+    With `incremental=True` a manifest of (path, mtime, size, formula) is kept
+    (by default under the analyzer cache dir) and only `.dax` files whose mtime
+    or size changed since the previous scan are re-read.
+    """
+    base = pathlib.Path(folder_path)
+    manifest = None
+    if incremental:
+        manifest = pathlib.Path(manifest_path) if manifest_path else _default_manifest_path(base)
+    return _collect_from_folder(base, manifest_path=manifest, workers=workers, profiler=active(profiler))
+
+
+def artifact_folder_signature(folder_path: str) -> str:
+    """Hash of the (path, mtime, size) of every `.dax` and `.bim` file `parse_artifact_folder` would see.
+
+    A directory walk with no file reads, for callers that want to know whether
+    a folder changed before re-parsing and re-merging it.
+    """
+    base = pathlib.Path(folder_path)
+    dax_entries, bim_paths = _scan_folder(str(base))
+    digest = hashlib.sha256(repr(dax_entries).encode("utf-8"))
+    sibling_bim = base.parent / f"{base.name}.bim"
+    for path in [*bim_paths, str(sibling_bim)]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(repr((path, stat.st_mtime_ns, stat.st_size)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parse_bim_file(bim_path: str, profiler: Optional[AnyProfiler] = None) -> ArtifactParseResult:
+    profiler = active(profiler)
+    with profiler.span("bim_parse"), open(bim_path, "rb") as fh:
+        measures = parse_bim(fh)
+    profiler.count("bim_objects", len(measures))
+    return ArtifactParseResult(
+        measures=measures,
+        has_bim=True,
+        bim_location="bim_file",
+        dax_count=len(measures),
+    )
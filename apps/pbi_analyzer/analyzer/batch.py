@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .artifacts import artifact_folder_signature, parse_artifact_folder
+from .cache import AnalysisCache, analyze_pbix_cached
+from .corpus_index import CorpusIndex, index_report_folders
+from .engine import build_markdown_summary, merge_dax_into_analysis
+from .instrument import log_diagnostics, profiler_for
+from .models import analysis_summary_dict
+from .semantic import analyze_pbix_path
+
+
+REPORT_OUTPUTS = ("visual_queries.json", "semantic_references.json")
+# Written only when the report was enriched from an artifact folder.
+ENRICHED_OUTPUTS = ("advanced_logic_analysis.json", "advanced_logic_analysis.md")
+# Inputs assumed for summary entries written before inputs were recorded.
+_DEFAULT_INPUTS = {"artifacts": None, "compact_refs": False}
+
+
+@dataclass
+class BatchResult:
+    entries: List[dict] = field(default_factory=list)
+    analyzed: int = 0
+    skipped: int = 0
+    failures: Dict[str, str] = field(default_factory=dict)
+    bytes_read: int = 0
+    elapsed: float = 0.0
+    indexed: int = 0
+
+    def throughput_line(self) -> str:
+        elapsed = max(self.elapsed, 1e-9)
+        return (
+            f"analyzed={self.analyzed} skipped={self.skipped} failed={len(self.failures)} "
+            f"elapsed={self.elapsed:.2f}s reports/s={self.analyzed / elapsed:.2f} "
+            f"MB/s={self.bytes_read / 1_000_000 / elapsed:.2f} indexed={self.indexed}"
+        )
+
+
+def discover_pbix(inputs: Iterable[str]) -> List[pathlib.Path]:
+    found = set()
+    for item in inputs:
+        path = pathlib.Path(item)
+        if path.is_dir():
+            found.update(p for p in path.rglob("*") if p.suffix.lower() == ".pbix" and p.is_file())
+        elif path.is_file():
+            found.add(path)
+    return sorted(found)
+
+
+def report_keys(pbix_files: Iterable[pathlib.Path]) -> Dict[pathlib.Path, str]:
+    """Output folder name per PBIX: its stem, or "stem (sub/dir)" when several files share a stem.
+
+    The suffix is each file's folder relative to the deepest folder common to
+    the files with that stem, so same-named reports on a share never overwrite
+    each other's outputs or summary entries.
+    """
+    by_stem: Dict[str, List[pathlib.Path]] = {}
+    for pbix in pbix_files:
+        by_stem.setdefault(pbix.stem, []).append(pbix)
+    keys: Dict[pathlib.Path, str] = {}
+    for stem, paths in by_stem.items():
+        if len(paths) == 1:
+            keys[paths[0]] = stem
+            continue
+        parents = [str(p.resolve().parent) for p in paths]
+        common = os.path.commonpath(parents)
+        for pbix, parent in zip(paths, parents):
+            relative = pathlib.Path(os.path.relpath(parent, common)).as_posix()
+            keys[pbix] = f"{stem} ({relative.replace('/', '_')})"
+    return keys
+
+
+def _write_json(path: pathlib.Path, payload) -> None:
+    # Write then rename so an interrupted run never leaves a half file that looks up to date.
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _run_inputs(artifact_dir: Optional[str], compact_refs: bool) -> dict:
+    """What a report's outputs depend on besides the PBIX; recorded in its summary entry."""
+    return {
+        "artifacts": artifact_folder_signature(artifact_dir) if artifact_dir else None,
+        "compact_refs": compact_refs,
+    }
+
+
+def _is_up_to_date(pbix: pathlib.Path, report_dir: pathlib.Path, previous: dict, inputs: dict) -> bool:
+    # A changed extract folder, or toggling --artifacts-root/--compact-refs, invalidates the outputs.
+    if previous.get("inputs", _DEFAULT_INPUTS) != inputs:
+        return False
+    source_mtime = pbix.stat().st_mtime
+    for name in REPORT_OUTPUTS + (ENRICHED_OUTPUTS if inputs["artifacts"] else ()):
+        out = report_dir / name
+        if not out.exists() or out.stat().st_mtime < source_mtime:
+            return False
+    return True
+
+
+def _analyze_one(
+    pbix_path: str,
+    report_dir: str,
+    artifact_dir: Optional[str],
+    use_cache: bool = True,
+    profile: Optional[str] = None,
+    compact_refs: bool = False,
+    parse_workers: int = 0,
+    inputs: Optional[dict] = None,
+) -> dict:
+    pbix = pathlib.Path(pbix_path)
+    out = pathlib.Path(report_dir)
+    profiler = profiler_for(profile)
+    with profiler:
+        if compact_refs:
+            # The cache holds full-fidelity analyses only.
+            analysis = analyze_pbix_path(pbix, profiler=profiler, compact_refs=True, parse_workers=parse_workers)
+        elif use_cache:
+            # Keyed by path so a changed PBIX only re-parses the visuals that changed.
+            with pbix.open("rb") as handle:
+                analysis = analyze_pbix_cached(
+                    AnalysisCache(),
+                    pbix.name,
+                    handle,
+                    identity=str(pbix.resolve()),
+                    profiler=profiler,
+                    parse_workers=parse_workers,
+                )
+        else:
+            analysis = analyze_pbix_path(pbix, profiler=profiler, parse_workers=parse_workers)
+        if artifact_dir:
+            parsed = parse_artifact_folder(artifact_dir, profiler=profiler)
+            analysis = merge_dax_into_analysis(analysis, parsed.measures, parsed.has_bim, profiler=profiler)
+
+    out.mkdir(parents=True, exist_ok=True)
+    _write_json(out / "visual_queries.json", list(analysis.visual_queries))
+    _write_json(out / "semantic_references.json", list(analysis.semantic_references))
+    if artifact_dir:
+        _write_json(out / "advanced_logic_analysis.json", analysis_summary_dict(analysis))
+        (out / "advanced_logic_analysis.md").write_text(build_markdown_summary(analysis), encoding="utf-8")
+    else:
+        for name in ENRICHED_OUTPUTS:
+            (out / name).unlink(missing_ok=True)
+    entry = {
+        "report": pbix.name,
+        "output": out.as_posix(),
+        "queries": analysis.total_queries,
+        "refs": analysis.total_refs,
+        "unique_measures": analysis.unique_measures,
+        "unique_columns": analysis.unique_columns,
+        "source_mode": analysis.source_mode,
+        "inputs": inputs or _run_inputs(artifact_dir, compact_refs),
+    }
+    if profiler.enabled:
+        entry["diagnostics"] = profiler.to_dict()
+    return entry
+
+
+def _load_previous_summary(out_dir: pathlib.Path) -> Dict[str, dict]:
+    path = out_dir / "summary.json"
+    if not path.exists():
+        return {}
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+    # Keyed like the output folders (see report_keys), not by file name.
+    return {
+        pathlib.PurePosixPath(str(e["output"]).replace("\\", "/")).name: e
+        for e in entries
+        if isinstance(e, dict) and e.get("output")
+    }
+
+
+def _write_summary(out_dir: pathlib.Path, entries: List[dict]) -> None:
+    _write_json(out_dir / "summary.json", entries)
+    lines = ["# PowerBI Examples - Query Logic Summary", ""]
+    for e in entries:
+        folder = pathlib.PurePosixPath(str(e["output"]).replace("\\", "/")).name
+        label = e["report"] if folder == pathlib.PurePosixPath(e["report"]).stem else f"{e['report']} ({folder})"
+        lines.append(
+            f"- {label}: queries={e['queries']}, refs={e['refs']}, "
+            f"unique_measures={e['unique_measures']}, unique_columns={e['unique_columns']}"
+        )
+    (out_dir / "summary.md").write_text("\n".join(lines), encoding="utf-8")
+
+
+def run_batch(
+    inputs: Iterable[str],
+    out_dir: str,
+    workers: Optional[int] = None,
+    artifacts_root: Optional[str] = None,
+    force: bool = False,
+    index_path: Optional[str] = None,
+    use_cache: bool = True,
+    profile: Optional[str] = None,
+    compact_refs: bool = False,
+    parse_workers: int = 0,
+) -> BatchResult:
+    out = pathlib.Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    previous = _load_previous_summary(out)
+    result = BatchResult()
+    entries: Dict[str, dict] = {}
+    pending = []
+
+    for pbix, key in report_keys(discover_pbix(inputs)).items():
+        report_dir = out / key
+        artifact_dir = None
+        if artifacts_root:
+            candidate = pathlib.Path(artifacts_root) / key
+            if candidate.is_dir():
+                artifact_dir = str(candidate)
+        inputs = _run_inputs(artifact_dir, compact_refs)
+        if not force and key in previous and _is_up_to_date(pbix, report_dir, previous[key], inputs):
+            entries[key] = previous[key]
+            result.skipped += 1
+            continue
+        pending.append((pbix, key, report_dir, artifact_dir, inputs))
+
+    started = time.perf_counter()
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _analyze_one,
+                    str(pbix),
+                    str(report_dir),
+                    artifact_dir,
+                    use_cache,
+                    profile,
+                    compact_refs,
+                    parse_workers,
+                    inputs,
+                ): (pbix, key)
+                for pbix, key, report_dir, artifact_dir, inputs in pending
+            }
+            for future in as_completed(futures):
+                pbix, key = futures[future]
+                try:
+                    entries[key] = future.result()
+                except Exception as exc:
+                    result.failures[str(pbix)] = str(exc)
+                    continue
+                result.analyzed += 1
+                result.bytes_read += pbix.stat().st_size
+                if "diagnostics" in entries[key]:
+                    log_diagnostics(entries[key]["diagnostics"], report=key)
+    result.elapsed = time.perf_counter() - started
+
+    result.entries = [entries[name] for name in sorted(entries)]
+    _write_summary(out, result.entries)
+    if index_path is not None:
+        # Unchanged reports are skipped by fingerprint, so indexing every output stays cheap.
+        with CorpusIndex(index_path or None) as index:
+            result.indexed, _ = index_report_folders(index, [e["output"] for e in result.entries])
+    return result
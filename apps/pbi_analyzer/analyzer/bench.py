@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import io
+import json
+import pathlib
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+from . import __version__
+from .artifacts import parse_artifact_folder
+from .codec import decode_analysis, encode_analysis
+from .dax import clear_formula_cache
+from .engine import merge_dax_into_analysis
+from .models import ReportAnalysis, analysis_from_dict, analysis_to_dict
+from .semantic import analyze_pbix_bytes
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_WORDS = ["Sales", "Units", "Budget", "Margin", "Calc", "MTD", "YTD", "Growth", "Daily", "Index", "Ratio", "Cost"]
+
+
+@dataclass
+class BenchParams:
+    sections: int = 20
+    visuals_per_section: int = 25
+    projections: int = 4
+    query_depth: int = 3
+    tables: int = 12
+    dax_files: int = 500
+    seed: int = 7
+
+
+def _measure_name(rng: random.Random, index: int) -> str:
+    return " ".join(rng.sample(_WORDS, 2)) + f" {index}"
+
+
+def _condition(rng: random.Random, alias: str, depth: int) -> dict:
+    # Nested And/Or trees exercise the recursive reference walk.
+    if depth <= 0:
+        return {
+            "Comparison": {
+                "ComparisonKind": 0,
+                "Left": {
+                    "Column": {"Expression": {"SourceRef": {"Source": alias}}, "Property": f"Key {rng.randint(0, 50)}"}
+                },
+                "Right": {"Literal": {"Value": f"'{rng.randint(0, 999)}'"}},
+            }
+        }
+    op = "And" if depth % 2 else "Or"
+    return {op: {"Left": _condition(rng, alias, depth - 1), "Right": _condition(rng, alias, depth - 1)}}
+
+
+def _visual_config(rng: random.Random, params: BenchParams, measures: List[str], index: int) -> str:
+    tables = [f"Table {rng.randrange(params.tables)}" for _ in range(2)]
+    aliases = ["t0", "t1"]
+    select = []
+    projections = []
+    for p in range(params.projections):
+        table_idx = p % 2
+        name = rng.choice(measures)
+        kind = "Measure" if p % 3 else "Column"
+        select.append(
+            {
+                kind: {"Expression": {"SourceRef": {"Source": aliases[table_idx]}}, "Property": name},
+                "Name": f"{tables[table_idx]}.{name}",
+            }
+        )
+        projections.append({"queryRef": f"{tables[table_idx]}.{name}"})
+    query = {
+        "Version": 2,
+        "From": [{"Name": a, "Entity": t, "Type": 0} for a, t in zip(aliases, tables)],
+        "Select": select,
+        "Where": [{"Condition": _condition(rng, aliases[0], params.query_depth)}],
+    }
+    config = {
+        "name": f"visual{index}",
+        "singleVisual": {"visualType": "tableEx", "projections": {"Values": projections}, "prototypeQuery": query},
+        # Formatting payload that real configs carry and the analyzer must skip over.
+        "vcObjects": {"title": [{"properties": {"text": {"expr": {"Literal": {"Value": f"'Visual {index}'"}}}}}]},
+    }
+    return json.dumps(config)
+
+
+def synthetic_pbix(params: BenchParams) -> bytes:
+    """A PBIX-shaped zip holding only a UTF-16-LE Report/Layout."""
+    rng = random.Random(params.seed)
+    measures = [_measure_name(rng, i) for i in range(max(params.dax_files, 1))]
+    sections = []
+    index = 0
+    for s in range(params.sections):
+        containers = []
+        for v in range(params.visuals_per_section):
+            containers.append(
+                {
+                    "x": float(v * 10),
+                    "y": float(s * 10),
+                    "width": 300.0,
+                    "height": 200.0,
+                    "config": _visual_config(rng, params, measures, index),
+                }
+            )
+            index += 1
+        sections.append({"name": f"ReportSection{s}", "displayName": f"Page {s}", "visualContainers": containers})
+    layout = {"id": 0, "sections": sections, "config": "{}"}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("Report/Layout", json.dumps(layout).encode("utf-16-le"))
+        zf.writestr("Version", "1.28")
+    return buffer.getvalue()
+
+
+def write_synthetic_artifacts(root: pathlib.Path, params: BenchParams) -> pathlib.Path:
+    """Write `params.dax_files` measure .dax files under root/Model/tables/<table>/measures/."""
+    rng = random.Random(params.seed)
+    measures = [_measure_name(rng, i) for i in range(max(params.dax_files, 1))]
+    for i in range(params.dax_files):
+        table = f"Table {i % params.tables}"
+        folder = root / "Model" / "tables" / table / "measures"
+        folder.mkdir(parents=True, exist_ok=True)
+        # Reference only earlier measures so the dependency graph stays acyclic.
+        deps = [measures[j] for j in rng.sample(range(i), min(i, 2))]
+        body = " + ".join(f"[{d}]" for d in deps) or "0"
+        formula = f"CALCULATE(SUMX('{table}', '{table}'[Amount] * {rng.randint(1, 9)}) + {body}, ALL('{table}'))"
+        (folder / f"{measures[i]}.dax").write_text(formula, encoding="utf-8")
+    return root
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _time_stage(
+    fn: Callable[[object], object],
+    repeat: int,
+    trace_memory: bool,
+    setup: Callable[[], object] = lambda: None,
+) -> dict:
+    """Best-of-`repeat` wall time of `fn(setup())`; setup is not timed."""
+    runs = []
+    for _ in range(repeat):
+        arg = setup()
+        started = time.perf_counter()
+        fn(arg)
+        runs.append(time.perf_counter() - started)
+    result = {"seconds": min(runs), "runs": runs}
+    if trace_memory:
+        # Separate run: tracemalloc slows allocation-heavy code too much to time under it.
+        arg = setup()
+        tracemalloc.start()
+        try:
+            fn(arg)
+            result["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def _dump_json(analysis: ReportAnalysis) -> bytes:
+    return json.dumps(analysis_to_dict(analysis), separators=(",", ":")).encode("utf-8")
+
+
+def run_benchmarks(params: BenchParams, repeat: int = 3, trace_memory: bool = True) -> dict:
+    pbix = synthetic_pbix(params)
+    stages: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="pbi_bench_") as tmp:
+        artifacts = write_synthetic_artifacts(pathlib.Path(tmp), params)
+        parsed = parse_artifact_folder(str(artifacts))
+
+        stages["analyze_pbix_streaming"] = _time_stage(
+            lambda _: analyze_pbix_bytes("bench.pbix", pbix), repeat, trace_memory
+        )
+        stages["analyze_pbix_loaded"] = _time_stage(
+            lambda _: analyze_pbix_bytes("bench.pbix", pbix, streaming=False), repeat, trace_memory
+        )
+        stages["collect_artifact_folder"] = _time_stage(
+            lambda _: parse_artifact_folder(str(artifacts)), repeat, trace_memory
+        )
+        stages["merge_dax"] = _time_stage(
+            lambda analysis: merge_dax_into_analysis(analysis, parsed.measures, False),
+            repeat,
+            trace_memory,
+            setup=lambda: (clear_formula_cache(), analyze_pbix_bytes("bench.pbix", pbix))[1],
+        )
+
+        # The cache format (binary codec) against the plain-JSON round trip it replaced.
+        analysis = merge_dax_into_analysis(analyze_pbix_bytes("bench.pbix", pbix), parsed.measures, False)
+        as_json = _dump_json(analysis)
+        encoded = encode_analysis(analysis)
+        stages["dump_json"] = _time_stage(lambda _: _dump_json(analysis), repeat, trace_memory)
+        stages["dump_codec"] = _time_stage(lambda _: encode_analysis(analysis), repeat, trace_memory)
+        stages["load_json"] = _time_stage(
+            lambda _: analysis_from_dict(json.loads(as_json)), repeat, trace_memory
+        )
+        stages["load_codec"] = _time_stage(lambda _: decode_analysis(encoded), repeat, trace_memory)
+    return {
+        "analyzer_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": asdict(params),
+        "pbix_bytes": len(pbix),
+        "serialized_bytes": {"json": len(as_json), "codec": len(encoded)},
+        "stages": stages,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = 0.2) -> List[str]:
+    """Stages slower than the baseline by more than `threshold` (0.2 = 20%)."""
+    regressions = []
+    for stage, current in results.get("stages", {}).items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous:
+            continue
+        before, after = previous["seconds"], current["seconds"]
+        if before > 0 and after > before * (1 + threshold):
+            regressions.append(f"{stage}: {before:.4f}s -> {after:.4f}s ({(after / before - 1) * 100:+.0f}%)")
+    return regressions
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import IO, Dict, Iterator, List, Tuple
+
+from .jsonstream import JsonStream, iter_text_chunks
+from .models import MeasureDetail
+
+
+# (table, kind, object name, expression); kind is measures | columns | table.
+BimObject = Tuple[str, str, str, str]
+
+# Characters the pbi-tools extractor percent-encodes in file names (PathExtensions.SanitizeFilename).
+_FILENAME_ESCAPES = {ord(c): "%%%X" % ord(c) for c in '"<>|:*?/\\'}
+
+
+def _expression(value) -> str:
+    # TMSL stores long expressions as a list of lines.
+    if isinstance(value, list):
+        value = "\n".join(str(line) for line in value)
+    return str(value or "").strip()
+
+
+def _iter_table(stream: JsonStream) -> Iterator[BimObject]:
+    table_name = ""
+    pending: List[Tuple[str, str, str]] = []
+    for key in stream.iter_object():
+        if key == "name":
+            table_name = str(stream.read_value())
+        elif key in ("measures", "columns", "partitions") and stream.peek() == "[":
+            for _ in stream.iter_array():
+                item = stream.read_value()
+                if not isinstance(item, dict):
+                    continue
+                if key == "measures" and "expression" in item:
+                    pending.append(("measures", str(item.get("name", "")), _expression(item["expression"])))
+                elif key == "columns" and item.get("type") == "calculated" and "expression" in item:
+                    pending.append(("columns", str(item.get("name", "")), _expression(item["expression"])))
+                elif key == "partitions":
+                    source = item.get("source") or {}
+                    if source.get("type") == "calculated" and "expression" in source:
+                        pending.append(("table", "", _expression(source["expression"])))
+        else:
+            stream.skip_value()
+    # Only expressions are buffered, so memory stays bounded by one table's DAX.
+    for kind, name, expression in pending:
+        yield table_name, kind, name or table_name, expression
+
+
+def iter_bim_objects(binary: IO[bytes]) -> Iterator[BimObject]:
+    """Yield calculated objects from a `.bim` without building the full model tree."""
+    stream = JsonStream(iter_text_chunks(binary))
+    for key in stream.iter_object():
+        if key != "model" or stream.peek() != "{":
+            stream.skip_value()
+            continue
+        for model_key in stream.iter_object():
+            if model_key != "tables" or stream.peek() != "[":
+                stream.skip_value()
+                continue
+            for _ in stream.iter_array():
+                if stream.peek() != "{":
+                    stream.skip_value()
+                    continue
+                yield from _iter_table(stream)
+
+
+def sanitize_filename(name: str) -> str:
+    """`name` as the extractor writes it into a path segment ("w/ VA" -> "w%2F VA")."""
+    return name.translate(_FILENAME_ESCAPES)
+
+
+def bim_object_name(table: str, kind: str, name: str) -> str:
+    # Mirror the pbi-tools extract layout so BIM and .dax sources resolve identically.
+    table = sanitize_filename(table)
+    if kind == "table":
+        return f"Model/tables/{table}/table"
+    return f"Model/tables/{table}/{kind}/{sanitize_filename(name)}"
+
+
+def parse_bim(binary: IO[bytes]) -> Dict[str, MeasureDetail]:
+    measures: Dict[str, MeasureDetail] = {}
+    for table, kind, name, expression in iter_bim_objects(binary):
+        key = bim_object_name(table, kind, name)
+        measures[key] = MeasureDetail(
+            name=key,
+            source="dax",
+            dax_formula=expression,
+            usage_count=0,
+            sections=[],
+            matched_tokens=[],
+            complexity_score=0,
+        )
+    return measures
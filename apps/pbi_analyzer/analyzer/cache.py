@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import struct
+import threading
+import zipfile
+from io import BytesIO
+from typing import BinaryIO, Callable, Optional, TypeVar, Union
+
+from . import __version__
+from .artifacts import ArtifactParseResult
+from .codec import decode_analysis, encode_analysis
+from .instrument import AnyProfiler, active
+from .models import ReportAnalysis, measure_from_dict, measure_to_dict
+from .scoring import default_scorer
+from .semantic import analyze_pbix_file
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+ENTRY_SUFFIXES = (".json", ".pbia")  # JSON payloads, and analyses in analyzer.codec form
+CACHE_DIR_ENV = "PBI_ANALYZER_CACHE_DIR"
+_HASH_CHUNK = 1024 * 1024
+LAYOUT_MEMBER = "Report/Layout"
+_LOCAL_HEADER_SIZE = 30
+
+T = TypeVar("T")
+
+
+def default_cache_dir() -> pathlib.Path:
+    configured = os.environ.get(CACHE_DIR_ENV)
+    if configured:
+        return pathlib.Path(configured)
+    return pathlib.Path.home() / ".cache" / "pbi_analyzer"
+
+
+def _key_digest():
+    digest = hashlib.sha256(__version__.encode("utf-8"))
+    digest.update(default_scorer().fingerprint().encode("utf-8"))
+    return digest
+
+
+def content_key(*blobs: Optional[bytes]) -> str:
+    """Hash of the analyzer version, scoring config and each input blob (None marks an absent input)."""
+    digest = _key_digest()
+    for blob in blobs:
+        if blob is None:
+            digest.update(b"\x00none")
+            continue
+        digest.update(len(blob).to_bytes(8, "little"))
+        digest.update(blob)
+    return digest.hexdigest()
+
+
+def layout_content_key(handle: BinaryIO) -> str:
+    """Cache key of a seekable PBIX file, derived from its `Report/Layout` member only.
+
+    The analysis depends on nothing else in the file, so only the zip central
+    directory and the member's compressed bytes are read (the DataModel is
+    never touched). The key covers the member's CRC, sizes and compression
+    method plus the compressed bytes; the file is left rewound.
+    """
+    with zipfile.ZipFile(handle, "r") as zf:
+        try:
+            info = zf.getinfo(LAYOUT_MEMBER)
+        except KeyError:
+            raise ValueError("PBIX does not contain Report/Layout. Cannot run semantic analysis.") from None
+    digest = _key_digest()
+    digest.update(struct.pack("<QQLH", info.file_size, info.compress_size, info.CRC, info.compress_type))
+    handle.seek(info.header_offset)
+    header = handle.read(_LOCAL_HEADER_SIZE)
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local header for {LAYOUT_MEMBER}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    handle.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+    remaining = info.compress_size
+    while remaining:
+        chunk = handle.read(min(_HASH_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated {LAYOUT_MEMBER} member")
+        digest.update(chunk)
+        remaining -= len(chunk)
+    handle.seek(0)
+    return digest.hexdigest()
+
+
+def _artifacts_to_dict(result: ArtifactParseResult) -> dict:
+    return {
+        "measures": [measure_to_dict(m) for m in result.measures.values()],
+        "has_bim": result.has_bim,
+        "bim_location": result.bim_location,
+        "dax_count": result.dax_count,
+    }
+
+
+def _artifacts_from_dict(payload: dict) -> ArtifactParseResult:
+    measures = [measure_from_dict(m) for m in payload.get("measures", [])]
+    return ArtifactParseResult(
+        measures={m.name: m for m in measures},
+        has_bim=payload["has_bim"],
+        bim_location=payload["bim_location"],
+        dax_count=payload["dax_count"],
+    )
+
+
+class AnalysisCache:
+    """Content-addressed on-disk cache of analyses with size-bounded LRU eviction.
+
+    Entries are files named by `content_key` (analyses in the binary codec
+    form, everything else JSON); a hit refreshes the file mtime, and eviction
+    removes the least recently used files first.
+    """
+
+    def __init__(self, root: Optional[pathlib.Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = pathlib.Path(root) if root is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, kind: str, key: str, suffix: str = ".json") -> pathlib.Path:
+        return self.root / kind / f"{key}{suffix}"
+
+    def _load(
+        self,
+        kind: str,
+        key: str,
+        decode: Callable[[bytes], T] = json.loads,
+        suffix: str = ".json",
+        counted: bool = True,
+    ) -> Optional[T]:
+        path = self._path(kind, key, suffix)
+        try:
+            payload = decode(path.read_bytes())
+            os.utime(path)
+        except (OSError, ValueError):
+            payload = None
+        if counted:
+            with self._lock:
+                if payload is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+        return payload
+
+    def _store(self, kind: str, key: str, payload: dict) -> None:
+        self._store_bytes(kind, key, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+
+    def _store_bytes(self, kind: str, key: str, data: bytes, suffix: str = ".json") -> None:
+        path = self._path(kind, key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        self.evict()
+
+    def get_analysis(self, key: str) -> Optional[ReportAnalysis]:
+        return self._load("analysis", key, decode_analysis, ".pbia")
+
+    def put_analysis(self, key: str, analysis: ReportAnalysis) -> None:
+        self._store_bytes("analysis", key, encode_analysis(analysis), ".pbia")
+
+    def get_artifacts(self, key: str) -> Optional[ArtifactParseResult]:
+        payload = self._load("artifacts", key)
+        return _artifacts_from_dict(payload) if payload is not None else None
+
+    def put_artifacts(self, key: str, result: ArtifactParseResult) -> None:
+        self._store("artifacts", key, _artifacts_to_dict(result))
+
+    def get_latest_analysis(self, identity: str) -> Optional[ReportAnalysis]:
+        """Most recent cached analysis of a report (by path or name), whatever its content key.
+
+        Only feeds visual reuse, so it is left out of `hits`/`misses`, which count lookups of analyses themselves.
+        """
+        pointer = self._load("latest", hashlib.sha256(identity.encode("utf-8")).hexdigest(), counted=False)
+        if pointer is None:
+            return None
+        return self._load("analysis", pointer["key"], decode_analysis, ".pbia", counted=False)
+
+    def set_latest(self, identity: str, key: str) -> None:
+        self._store("latest", hashlib.sha256(identity.encode("utf-8")).hexdigest(), {"key": key})
+
+    def _entries(self):
+        entries = []
+        if not self.root.exists():
+            return entries
+        for kind_dir in os.scandir(self.root):
+            if not kind_dir.is_dir():
+                continue
+            for entry in os.scandir(kind_dir.path):
+                if entry.is_file() and entry.name.endswith(ENTRY_SUFFIXES):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self) -> int:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def analyze_pbix_cached(
+    cache: AnalysisCache,
+    pbix_name: str,
+    pbix_content: Union[bytes, BinaryIO],
+    identity: Optional[str] = None,
+    profiler: Optional[AnyProfiler] = None,
+    parse_workers: int = 0,
+) -> ReportAnalysis:
+    """Cached PBIX analysis; on a miss, unchanged visuals of the report's previous analysis are reused.
+
+    `pbix_content` may be the bytes or a seekable binary file; the key is taken
+    from its `Report/Layout` member (`layout_content_key`), so neither a lookup
+    nor an analysis reads the rest of the file.
+    """
+    profiler = active(profiler)
+    if isinstance(pbix_content, (bytes, bytearray)):
+        pbix_content = BytesIO(pbix_content)
+    with profiler.span("cache_lookup"):
+        key = layout_content_key(pbix_content)
+        analysis = cache.get_analysis(key)
+    if analysis is None:
+        profiler.count("cache_misses")
+        identity = identity or pbix_name
+        analysis = analyze_pbix_file(
+            pbix_name,
+            pbix_content,
+            previous=cache.get_latest_analysis(identity),
+            profiler=profiler,
+            parse_workers=parse_workers,
+        )
+        with profiler.span("cache_store"):
+            cache.put_analysis(key, analysis)
+            cache.set_latest(identity, key)
+    else:
+        profiler.count("cache_hits")
+        # Stored diagnostics describe the run that filled the cache, not this lookup.
+        analysis.diagnostics = profiler.to_dict()
+    analysis.report_name = pbix_name
+    return analysis
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import zlib
+from typing import List
+
+from .columnar import RefTable, VisualQueryStore
+from .models import ReportAnalysis, analysis_from_dict, analysis_to_dict
+
+
+MAGIC = b"PBIA"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sBI")  # magic, format version, blob count
+_LENGTH = struct.Struct("<Q")
+
+
+def encode_analysis(analysis: ReportAnalysis) -> bytes:
+    """Binary form of an analysis for the cache and for passing between processes.
+
+    Scalars, measures and summaries go into one zlib-compressed compact JSON
+    header. The columnar stores are written as their raw buffers: reference
+    columns as array bytes and visual queries as their already-compressed
+    payloads, so neither is decoded into row dicts.
+    """
+    refs_meta, ref_blobs = analysis.semantic_references.dump_state()
+    visuals_meta, visual_blobs = analysis.visual_queries.dump_state()
+    header = {
+        "byteorder": sys.byteorder,
+        "analysis": analysis_to_dict(analysis, rows=False),
+        "refs": refs_meta,
+        "visuals": visuals_meta,
+        "ref_blobs": len(ref_blobs),
+    }
+    blobs = [zlib.compress(json.dumps(header, separators=(",", ":")).encode("utf-8"), 1)]
+    blobs.extend(ref_blobs)
+    blobs.extend(visual_blobs)
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(blobs))]
+    parts.extend(_LENGTH.pack(len(blob)) for blob in blobs)
+    parts.extend(blobs)
+    return b"".join(parts)
+
+
+def _split_blobs(data: bytes) -> List[bytes]:
+    if len(data) < _HEADER.size:
+        raise ValueError("Truncated analysis blob.")
+    magic, version, count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an encoded analysis.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported analysis format version {version}.")
+    offset = _HEADER.size
+    lengths = [_LENGTH.unpack_from(data, offset + i * _LENGTH.size)[0] for i in range(count)]
+    offset += count * _LENGTH.size
+    if offset + sum(lengths) != len(data):
+        raise ValueError("Truncated analysis blob.")
+    view = memoryview(data)
+    blobs = []
+    for length in lengths:
+        blobs.append(view[offset : offset + length])
+        offset += length
+    return blobs
+
+
+def decode_analysis(data: bytes) -> ReportAnalysis:
+    """Inverse of `encode_analysis`; raises ValueError for anything it did not produce."""
+    try:
+        return _decode(data)
+    except (KeyError, TypeError, IndexError, struct.error, zlib.error) as exc:
+        raise ValueError(f"Corrupt analysis blob: {exc}") from exc
+
+
+def _decode(data: bytes) -> ReportAnalysis:
+    blobs = _split_blobs(data)
+    header = json.loads(zlib.decompress(blobs[0]))
+    byteorder = header["byteorder"]
+    split = 1 + header["ref_blobs"]
+    payload = header["analysis"]
+    payload["semantic_references"] = RefTable.load_state(header["refs"], blobs[1:split], byteorder)
+    payload["visual_queries"] = VisualQueryStore.load_state(header["visuals"], blobs[split:], byteorder)
+    return analysis_from_dict(payload)
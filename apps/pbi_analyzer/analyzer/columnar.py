@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import sys
+import zlib
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+_FLAT = 0  # {"type", "table", "name", "section"} as produced by analyze_pbix_bytes
+_CONTEXT = 1  # {"type", "table", "name", "context": {"section", "x", "y"}} as in precomputed outputs
+_VERBATIM = 2  # anything else, kept as the original dict
+_COUNTED = 3  # _FLAT plus "count", as produced by analyze_pbix_bytes(compact_refs=True)
+
+_FLAT_KEYS = frozenset(("type", "table", "name", "section"))
+_COUNTED_KEYS = frozenset(("type", "table", "name", "section", "count"))
+_CONTEXT_KEYS = frozenset(("type", "table", "name", "context"))
+_CONTEXT_INNER_KEYS = frozenset(("section", "x", "y"))
+
+
+class StringPool:
+    """Interned string table; None is encoded as -1."""
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringPool":
+        pool = cls()
+        pool.strings = [sys.intern(s) for s in strings]
+        pool._codes = {s: i for i, s in enumerate(pool.strings)}
+        return pool
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return -1
+        return self._codes.get(value)
+
+    def get(self, code: int) -> Optional[str]:
+        return self.strings[code] if code >= 0 else None
+
+
+class _SequenceBase(Sequence):
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._row(index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, tuple, Sequence)) and not isinstance(other, (str, bytes)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def to_list(self) -> List[dict]:
+        return [self._row(i) for i in range(len(self))]
+
+
+def _array_from(typecode: str, blob: bytes, byteorder: str) -> array:
+    values = array(typecode)
+    values.frombytes(blob)
+    if byteorder != sys.byteorder and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+class RefTable(_SequenceBase):
+    """Integer-coded columns for semantic references.
+
+    Behaves like the list of reference dicts it replaces (iteration, slicing,
+    len) while storing each row as a handful of array entries.
+    """
+
+    def __init__(self) -> None:
+        self.pool = StringPool()
+        self.types = array("i")
+        self.tables = array("i")
+        self.names = array("i")
+        self.sections = array("i")
+        self.xs = array("d")
+        self.ys = array("d")
+        self.layouts = array("b")
+        self._verbatim: Dict[int, dict] = {}
+        self._counts: Dict[int, int] = {}
+
+    @classmethod
+    def from_refs(cls, refs: Iterable[dict]) -> "RefTable":
+        if isinstance(refs, RefTable):
+            return refs
+        table = cls()
+        for ref in refs:
+            table.append(ref)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def append(self, ref: dict) -> None:
+        code = self.pool.code
+        keys = ref.keys()
+        layout = _VERBATIM
+        section = x = y = None
+        if keys == _FLAT_KEYS:
+            layout = _FLAT
+            section = ref["section"]
+        elif keys == _COUNTED_KEYS and isinstance(ref["count"], int):
+            layout = _COUNTED
+            section = ref["section"]
+            self._counts[len(self.types)] = ref["count"]
+        elif keys == _CONTEXT_KEYS and isinstance(ref["context"], dict) and ref["context"].keys() == _CONTEXT_INNER_KEYS:
+            layout = _CONTEXT
+            ctx = ref["context"]
+            section, x, y = ctx["section"], ctx["x"], ctx["y"]
+            if not (x is None or isinstance(x, float)) or not (y is None or isinstance(y, float)):
+                layout = _VERBATIM
+        else:
+            section = ref.get("section")
+            if section is None and isinstance(ref.get("context"), dict):
+                section = ref["context"].get("section")
+        if layout == _VERBATIM:
+            self._verbatim[len(self.types)] = ref
+            x = y = None
+        self.types.append(code(ref.get("type")))
+        self.tables.append(code(ref.get("table")))
+        self.names.append(code(ref.get("name")))
+        self.sections.append(code(section if isinstance(section, str) else None))
+        self.xs.append(math.nan if x is None else x)
+        self.ys.append(math.nan if y is None else y)
+        self.layouts.append(layout)
+
+    def append_fields(
+        self, ref_type: str, table: Optional[str], name: Optional[str], section: str, counted: bool = False
+    ) -> int:
+        """Append a flat row from its parts without building a dict; returns the row index.
+
+        Counted rows start at 1 and are bumped with `add_occurrence`.
+        """
+        code = self.pool.code
+        row = len(self.types)
+        self.types.append(code(ref_type))
+        self.tables.append(code(table))
+        self.names.append(code(name))
+        self.sections.append(code(section if isinstance(section, str) else None))
+        self.xs.append(math.nan)
+        self.ys.append(math.nan)
+        if counted:
+            self.layouts.append(_COUNTED)
+            self._counts[row] = 1
+        else:
+            self.layouts.append(_FLAT)
+        return row
+
+    def add_occurrence(self, row: int) -> None:
+        self._counts[row] += 1
+
+    def occurrences(self) -> int:
+        """Number of references represented, counting each counted row by its count."""
+        return len(self.types) + sum(self._counts.values()) - len(self._counts)
+
+    _COLUMNS = ("types", "tables", "names", "sections", "xs", "ys", "layouts")
+
+    def dump_state(self) -> Tuple[dict, List[bytes]]:
+        """JSON-able metadata plus one raw buffer per column, for `analyzer.codec`."""
+        meta = {
+            "pool": self.pool.strings,
+            "verbatim": [[i, row] for i, row in self._verbatim.items()],
+            "counts": [[i, n] for i, n in self._counts.items()],
+        }
+        return meta, [getattr(self, name).tobytes() for name in self._COLUMNS]
+
+    @classmethod
+    def load_state(cls, meta: dict, blobs: List[bytes], byteorder: str = sys.byteorder) -> "RefTable":
+        table = cls()
+        table.pool = StringPool.from_strings(meta["pool"])
+        for name, blob in zip(cls._COLUMNS, blobs):
+            setattr(table, name, _array_from(getattr(table, name).typecode, blob, byteorder))
+        table._verbatim = {i: row for i, row in meta.get("verbatim", [])}
+        table._counts = {i: n for i, n in meta.get("counts", [])}
+        return table
+
+    def extend_from(self, other: "RefTable", start: int, stop: int) -> None:
+        """Copy rows [start, stop) of another table without rebuilding their dicts."""
+        if other is self:
+            raise ValueError("extend_from needs a different RefTable")
+        code = self.pool.code
+        remap = other.pool.get
+        for i in range(start, stop):
+            if other.layouts[i] == _VERBATIM:
+                self._verbatim[len(self.types)] = other._verbatim[i]
+            elif other.layouts[i] == _COUNTED:
+                self._counts[len(self.types)] = other._counts[i]
+            self.types.append(code(remap(other.types[i])))
+            self.tables.append(code(remap(other.tables[i])))
+            self.names.append(code(remap(other.names[i])))
+            self.sections.append(code(remap(other.sections[i])))
+            self.xs.append(other.xs[i])
+            self.ys.append(other.ys[i])
+            self.layouts.append(other.layouts[i])
+
+    def _row(self, i: int) -> dict:
+        layout = self.layouts[i]
+        if layout == _VERBATIM:
+            return self._verbatim[i]
+        get = self.pool.get
+        row = {"type": get(self.types[i]), "table": get(self.tables[i]), "name": get(self.names[i])}
+        if layout == _FLAT:
+            row["section"] = get(self.sections[i])
+        elif layout == _COUNTED:
+            row["section"] = get(self.sections[i])
+            row["count"] = self._counts[i]
+        else:
+            x, y = self.xs[i], self.ys[i]
+            row["context"] = {
+                "section": get(self.sections[i]),
+                "x": None if math.isnan(x) else x,
+                "y": None if math.isnan(y) else y,
+            }
+        return row
+
+    def distinct_rows(self) -> Set[Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]]:
+        """Distinct (type, table, name, section) keys, deduplicated on integer codes first."""
+        get = self.pool.get
+        codes = set(zip(self.types, self.tables, self.names, self.sections))
+        return {(get(c), get(t), get(n), get(s)) for c, t, n, s in codes}
+
+    def section_type_counts(self) -> Counter:
+        get = self.pool.get
+        codes = Counter(zip(self.sections, self.types))
+        return Counter({(get(s), get(t)): n for (s, t), n in codes.items()})
+
+
+class VisualQueryStore(_SequenceBase):
+    """Visual query objects kept as compressed compact JSON and decoded on access.
+
+    Section names are interned and indexed so drilldowns never decode visuals
+    from other sections.
+    """
+
+    def __init__(self) -> None:
+        self.pool = StringPool()
+        self.sections = array("i")
+        self._payloads: List[bytes] = []
+        self._by_section: Dict[int, List[int]] = {}
+
+    @classmethod
+    def from_visuals(cls, visuals: Iterable[dict]) -> "VisualQueryStore":
+        if isinstance(visuals, VisualQueryStore):
+            return visuals
+        store = cls()
+        for visual in visuals:
+            store.append(visual)
+        return store
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    @staticmethod
+    def encode(visual: dict) -> bytes:
+        """Stored form of one visual; lets another process do the encoding for `append_encoded`."""
+        return zlib.compress(json.dumps(visual, separators=(",", ":")).encode("utf-8"))
+
+    def append(self, visual: dict) -> None:
+        section = visual.get("section", "Unknown")
+        self.append_encoded(section if isinstance(section, str) else None, self.encode(visual))
+
+    def append_encoded(self, section: Optional[str], payload: bytes) -> None:
+        code = self.pool.code(section)
+        self._by_section.setdefault(code, []).append(len(self._payloads))
+        self.sections.append(code)
+        self._payloads.append(payload)
+
+    def append_from(self, other: "VisualQueryStore", index: int) -> None:
+        """Copy one stored visual without decoding and re-compressing it."""
+        code = self.pool.code(other.pool.get(other.sections[index]))
+        self._by_section.setdefault(code, []).append(len(self._payloads))
+        self.sections.append(code)
+        self._payloads.append(other._payloads[index])
+
+    def _row(self, i: int) -> dict:
+        return json.loads(zlib.decompress(self._payloads[i]))
+
+    def dump_state(self) -> Tuple[dict, List[bytes]]:
+        """Section codes, payload lengths and the concatenated (still compressed) payloads."""
+        lengths = array("q", (len(p) for p in self._payloads))
+        return {"pool": self.pool.strings}, [self.sections.tobytes(), lengths.tobytes(), b"".join(self._payloads)]
+
+    @classmethod
+    def load_state(cls, meta: dict, blobs: List[bytes], byteorder: str = sys.byteorder) -> "VisualQueryStore":
+        store = cls()
+        store.pool = StringPool.from_strings(meta["pool"])
+        store.sections = _array_from("i", blobs[0], byteorder)
+        data = memoryview(blobs[2])
+        offset = 0
+        for length in _array_from("q", blobs[1], byteorder):
+            store._payloads.append(bytes(data[offset : offset + length]))
+            offset += length
+        for index, code in enumerate(store.sections):
+            store._by_section.setdefault(code, []).append(index)
+        return store
+
+    def section_names(self) -> List[str]:
+        return sorted(name for name in (self.pool.get(c) for c in self._by_section) if name is not None)
+
+    def section_indices(self, section: str) -> List[int]:
+        code = self.pool.lookup(section)
+        return list(self._by_section.get(code, [])) if code is not None else []
+
+    def payload_bytes(self) -> int:
+        return sum(len(p) for p in self._payloads)
+
+    def digest(self) -> str:
+        """Content hash over the stored visuals, in order."""
+        digest = hashlib.sha256()
+        for payload in self._payloads:
+            digest.update(len(payload).to_bytes(4, "little"))
+            digest.update(payload)
+        return digest.hexdigest()
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import os
+import pathlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .demo_loader import load_precomputed_report, report_folder_signature
+from .models import ReportAnalysis
+
+
+INDEX_PATH_ENV = "PBI_ANALYZER_INDEX"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    source_signature TEXT
+);
+CREATE TABLE IF NOT EXISTS objects (
+    id INTEGER PRIMARY KEY,
+    table_name TEXT NOT NULL COLLATE NOCASE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    type TEXT NOT NULL,
+    UNIQUE (table_name, name, type)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    object_id INTEGER NOT NULL,
+    report_id INTEGER NOT NULL,
+    visual INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    PRIMARY KEY (object_id, report_id, visual)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_report ON postings (report_id);
+"""
+
+# Columns added after the first release, created on open for older index files.
+_MIGRATIONS = {"source_signature": "ALTER TABLE reports ADD COLUMN source_signature TEXT"}
+
+# (type, table, name) of one field a visual reads.
+FieldRef = Tuple[str, str, str]
+
+
+@dataclass
+class Posting:
+    report: str
+    section: str
+    visual: int
+    type: str
+    table: str
+    name: str
+
+
+def default_index_path() -> pathlib.Path:
+    configured = os.environ.get(INDEX_PATH_ENV)
+    if configured:
+        return pathlib.Path(configured)
+    from .cache import default_cache_dir
+
+    return default_cache_dir() / "corpus_index.sqlite3"
+
+
+def report_index_name(report_name: str) -> str:
+    """Index identity of a report: its name without a .pbix suffix.
+
+    Batch output folders are named after the PBIX stem while uploads keep the
+    file name, so both forms must map to the same report.
+    """
+    if report_name.lower().endswith(".pbix"):
+        return report_name[: -len(".pbix")]
+    return report_name
+
+
+def iter_visual_fields(query: dict) -> Iterator[FieldRef]:
+    """Measures and columns a visual query reads, with `From` aliases resolved to tables."""
+    if not isinstance(query, dict):
+        return
+    aliases = {
+        item.get("Name"): item.get("Entity")
+        for item in query.get("From", []) or []
+        if isinstance(item, dict)
+    }
+    stack: List[object] = [query]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        for kind in ("Measure", "Column"):
+            field_node = node.get(kind)
+            if isinstance(field_node, dict) and field_node.get("Property"):
+                source = (field_node.get("Expression") or {}).get("SourceRef") or {}
+                table = source.get("Entity") or aliases.get(source.get("Source")) or ""
+                yield kind, table, field_node["Property"]
+        stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+
+
+def split_query_ref(ref: str) -> List[Tuple[str, str]]:
+    """Candidate (table, name) pairs for "Table.Name"; both parts may contain dots."""
+    inner = ref.strip()
+    if inner.endswith(")") and "(" in inner:
+        inner = inner[inner.index("(") + 1 : -1]
+    pairs = []
+    dot = inner.find(".")
+    while dot != -1:
+        pairs.append((inner[:dot], inner[dot + 1 :]))
+        dot = inner.find(".", dot + 1)
+    return pairs
+
+
+class CorpusIndex:
+    """Persistent inverted index from (table, name) to the visuals that use it.
+
+    Backed by a single SQLite file. Re-indexing a report replaces only that
+    report's postings, and unchanged reports (same visual content) are skipped.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path, None] = None):
+        self.path = pathlib.Path(path) if path is not None else default_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+        self._object_ids: Dict[FieldRef, int] = {}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CorpusIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _object_id(self, field: FieldRef) -> int:
+        cached = self._object_ids.get(field)
+        if cached is not None:
+            return cached
+        kind, table, name = field
+        self._conn.execute(
+            "INSERT OR IGNORE INTO objects (table_name, name, type) VALUES (?, ?, ?)", (table, name, kind)
+        )
+        row = self._conn.execute(
+            "SELECT id FROM objects WHERE table_name = ? AND name = ? AND type = ?", (table, name, kind)
+        ).fetchone()
+        self._object_ids[field] = row[0]
+        return row[0]
+
+    def source_is_current(self, report_name: str, source_signature: str) -> bool:
+        """Whether the report was last indexed from sources with this signature (checked before loading them)."""
+        row = self._conn.execute(
+            "SELECT source_signature FROM reports WHERE name = ?", (report_index_name(report_name),)
+        ).fetchone()
+        return row is not None and row[0] == source_signature
+
+    def index_report(
+        self, analysis: ReportAnalysis, force: bool = False, source_signature: Optional[str] = None
+    ) -> bool:
+        """Replace the postings of one report; returns False when it was already current.
+
+        `source_signature` identifies the files the analysis was loaded from, so
+        `source_is_current` can skip them next time without loading.
+        """
+        name = report_index_name(analysis.report_name)
+        fingerprint = analysis.visual_queries.digest()
+        row = self._conn.execute("SELECT id, fingerprint FROM reports WHERE name = ?", (name,)).fetchone()
+        if row is not None and row[1] == fingerprint and not force:
+            if source_signature is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE reports SET source_signature = ? WHERE id = ?", (source_signature, row[0])
+                    )
+            return False
+        with self._conn:
+            if row is None:
+                report_id = self._conn.execute(
+                    "INSERT INTO reports (name, fingerprint, indexed_at, source_signature) VALUES (?, ?, ?, ?)",
+                    (name, fingerprint, time.time(), source_signature),
+                ).lastrowid
+            else:
+                report_id = row[0]
+                self._conn.execute("DELETE FROM postings WHERE report_id = ?", (report_id,))
+                self._conn.execute(
+                    "UPDATE reports SET fingerprint = ?, indexed_at = ?, source_signature = ? WHERE id = ?",
+                    (fingerprint, time.time(), source_signature, report_id),
+                )
+            rows = []
+            for visual_index, visual in enumerate(analysis.visual_queries):
+                section = str(visual.get("section") or "Unknown")
+                for field in set(iter_visual_fields(visual.get("query", {}))):
+                    rows.append((self._object_id(field), report_id, visual_index, section))
+            self._conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?, ?)", rows)
+        return True
+
+    def remove_report(self, report_name: str) -> None:
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM reports WHERE name = ?", (report_index_name(report_name),)
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM postings WHERE report_id = ?", (row[0],))
+            self._conn.execute("DELETE FROM reports WHERE id = ?", (row[0],))
+
+    def lookup(self, table: str, name: str, kind: Optional[str] = None) -> List[Posting]:
+        """Postings for one field; table and name match case-insensitively."""
+        sql = (
+            "SELECT r.name, p.section, p.visual, o.type, o.table_name, o.name "
+            "FROM objects o JOIN postings p ON p.object_id = o.id JOIN reports r ON r.id = p.report_id "
+            "WHERE o.table_name = ? AND o.name = ?"
+        )
+        params: list = [table, name]
+        if kind:
+            sql += " AND o.type = ?"
+            params.append(kind)
+        sql += " ORDER BY r.name, p.section, p.visual"
+        return [Posting(*row) for row in self._conn.execute(sql, params)]
+
+    def lookup_ref(self, ref: str) -> List[Posting]:
+        """Postings for a queryRef such as "SorDetail.Calc Index to Budget Bookings" or "Sum(T.Col)"."""
+        postings: List[Posting] = []
+        for table, name in split_query_ref(ref):
+            postings.extend(self.lookup(table, name))
+        return postings
+
+    def search(self, text: str, limit: int = 200) -> List[Tuple[str, str, str, int, int]]:
+        """Objects whose table or name contains `text`: (type, table, name, reports, visuals)."""
+        # "%" and "_" are common in measure names ("Margin_%"), so match them literally.
+        escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        rows = self._conn.execute(
+            "SELECT o.type, o.table_name, o.name, COUNT(DISTINCT p.report_id), COUNT(*) "
+            "FROM objects o JOIN postings p ON p.object_id = o.id "
+            "WHERE o.name LIKE ? ESCAPE '\\' OR o.table_name LIKE ? ESCAPE '\\' "
+            "OR (o.table_name || '.' || o.name) LIKE ? ESCAPE '\\' "
+            "GROUP BY o.id ORDER BY COUNT(DISTINCT p.report_id) DESC, o.table_name, o.name LIMIT ?",
+            (pattern, pattern, pattern, limit),
+        )
+        return [tuple(row) for row in rows]
+
+    def reports(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT name FROM reports ORDER BY name")]
+
+    def stats(self) -> dict:
+        return {
+            table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("reports", "objects", "postings")
+        }
+
+
+def index_reports(index: CorpusIndex, analyses: Iterable[ReportAnalysis], force: bool = False) -> Tuple[int, int]:
+    """Index many reports; returns (updated, unchanged)."""
+    updated = unchanged = 0
+    for analysis in analyses:
+        if index.index_report(analysis, force=force):
+            updated += 1
+        else:
+            unchanged += 1
+    return updated, unchanged
+
+
+def find_report_folders(paths: Iterable[Union[str, pathlib.Path]]) -> List[pathlib.Path]:
+    """Batch output folders (holding visual_queries.json) among `paths` and their direct children."""
+    found = []
+    for item in paths:
+        path = pathlib.Path(item)
+        if (path / "visual_queries.json").is_file():
+            found.append(path)
+        elif path.is_dir():
+            found.extend(sorted(p for p in path.iterdir() if (p / "visual_queries.json").is_file()))
+    return found
+
+
+def index_report_folders(
+    index: CorpusIndex, folders: Iterable[Union[str, pathlib.Path]], force: bool = False
+) -> Tuple[int, int]:
+    """Index report output folders; returns (updated, unchanged).
+
+    A folder whose output files have the same mtimes and sizes as when it was
+    last indexed is skipped without being loaded.
+    """
+    updated = unchanged = 0
+    for folder in find_report_folders(folders):
+        signature = repr(report_folder_signature(folder))
+        if not force and index.source_is_current(folder.name, signature):
+            unchanged += 1
+            continue
+        if index.index_report(load_precomputed_report(folder), force=force, source_signature=signature):
+            updated += 1
+        else:
+            unchanged += 1
+    return updated, unchanged
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterator, List, Tuple
+
+
+# Keywords that may directly precede a bracketed measure ("RETURN [Total]"); never a table name.
+_KEYWORDS = ("RETURN", "VAR", "NOT", "IN", "AND", "OR", "DEFINE", "EVALUATE", "MEASURE", "ORDER", "BY", "ASC", "DESC")
+
+# One alternation, tried left to right; column refs come before bare identifiers so
+# `Sales[Amount]` is not split into a name and a measure ref.
+_TOKEN = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"]|"")*"?)
+  | (?P<column>(?:'(?:[^']|'')*'|(?!(?i:%s)(?![\w.]))[A-Za-z_][\w.]*)\s*\[(?:[^\]]|\]\])*\]?)
+  | (?P<measure>\[(?:[^\]]|\]\])*\]?)
+  | (?P<function>[A-Za-z_][\w.]*)(?=\s*\()
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<operator>:=|<=|>=|<>|==|&&|\|\||[-+*/^&=<>,])
+    """
+    % "|".join(_KEYWORDS),
+    re.VERBOSE | re.DOTALL,
+)
+
+_COLUMN_PARTS = re.compile(r"('(?:[^']|'')*'|[^\s\[]+)\s*(\[.*)", re.DOTALL)
+
+# Functions that evaluate an expression row by row over a table.
+ITERATOR_FUNCTIONS = frozenset(
+    {
+        "ADDCOLUMNS",
+        "AVERAGEX",
+        "CONCATENATEX",
+        "COUNTAX",
+        "COUNTX",
+        "FILTER",
+        "GENERATE",
+        "GENERATEALL",
+        "GEOMEANX",
+        "MAXX",
+        "MEDIANX",
+        "MINX",
+        "PERCENTILEX.EXC",
+        "PERCENTILEX.INC",
+        "PRODUCTX",
+        "RANKX",
+        "SELECTCOLUMNS",
+        "STDEVX.P",
+        "STDEVX.S",
+        "SUMX",
+        "TOPN",
+        "VARX.P",
+        "VARX.S",
+    }
+)
+
+# Functions that turn the current row/filter context into a new filter context.
+CONTEXT_TRANSITION_FUNCTIONS = frozenset({"CALCULATE", "CALCULATETABLE"})
+
+DaxToken = Tuple[str, str]  # (kind, text)
+
+
+def tokenize(formula: str) -> Iterator[DaxToken]:
+    """Yield (kind, text) tokens; whitespace and unknown characters are dropped."""
+    for match in _TOKEN.finditer(formula):
+        yield match.lastgroup, match.group()
+
+
+def _unbracket(text: str) -> str:
+    return text[1:-1].replace("]]", "]") if text.endswith("]") else text[1:]
+
+
+def _split_column(text: str) -> Tuple[str, str]:
+    table, column = _COLUMN_PARTS.match(text).groups()
+    if table.startswith("'"):
+        table = table[1:-1].replace("''", "'")
+    return table, _unbracket(column)
+
+
+@dataclass
+class DaxMetrics:
+    functions: Dict[str, int] = field(default_factory=dict)
+    iterator_calls: int = 0
+    max_depth: int = 0
+    context_transitions: int = 0
+    measure_refs: List[str] = field(default_factory=list)
+    column_refs: List[Tuple[str, str]] = field(default_factory=list)  # (table, column)
+
+    @property
+    def score(self) -> int:
+        return (
+            len(self.functions)
+            + 2 * self.iterator_calls
+            + 2 * self.context_transitions
+            + max(0, self.max_depth - 1)
+            + len(self.measure_refs)
+        )
+
+    @property
+    def matched_tokens(self) -> List[str]:
+        tokens = list(self.functions)
+        if self.max_depth > 1:
+            tokens.append(f"depth:{self.max_depth}")
+        if self.context_transitions:
+            tokens.append(f"context_transitions:{self.context_transitions}")
+        return tokens
+
+
+def _analyze(formula: str) -> DaxMetrics:
+    functions: Counter = Counter()
+    measures: Dict[str, None] = {}
+    columns: Dict[Tuple[str, str], None] = {}
+    iterator_calls = transitions = max_depth = 0
+    # One entry per open paren: True when it belongs to an iterator call.
+    stack: List[bool] = []
+    iterators_open = 0
+    pending_function = ""
+    for kind, text in tokenize(formula):
+        if kind == "function":
+            pending_function = text.upper()
+            functions[pending_function] += 1
+            if pending_function in ITERATOR_FUNCTIONS:
+                iterator_calls += 1
+            elif pending_function in CONTEXT_TRANSITION_FUNCTIONS:
+                transitions += 1
+            continue
+        if kind == "open":
+            is_iterator = pending_function in ITERATOR_FUNCTIONS
+            stack.append(is_iterator)
+            iterators_open += is_iterator
+            max_depth = max(max_depth, len(stack))
+        elif kind == "close":
+            if stack:
+                iterators_open -= stack.pop()
+        elif kind == "measure":
+            measures[_unbracket(text)] = None
+            # A measure evaluated in row context gets an implicit CALCULATE.
+            if iterators_open:
+                transitions += 1
+        elif kind == "column":
+            columns[_split_column(text)] = None
+        pending_function = ""
+    return DaxMetrics(
+        functions=dict(functions),
+        iterator_calls=iterator_calls,
+        max_depth=max_depth,
+        context_transitions=transitions,
+        measure_refs=list(measures),
+        column_refs=list(columns),
+    )
+
+
+@lru_cache(maxsize=16384)
+def _analyze_cached(formula: str) -> DaxMetrics:
+    return _analyze(formula)
+
+
+def analyze_formula(formula: str) -> DaxMetrics:
+    """Lex one DAX expression and derive structural complexity metrics.
+
+    Results are memoized by formula text; treat the returned object as read-only.
+    """
+    return _analyze_cached(formula)
+
+
+def clear_formula_cache() -> None:
+    _analyze_cached.cache_clear()
+
+
+def formula_score(formula: str) -> Tuple[int, List[str]]:
+    metrics = analyze_formula(formula)
+    return metrics.score, metrics.matched_tokens
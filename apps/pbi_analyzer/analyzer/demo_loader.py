@@ -2,20 +2,13 @@ from __future__ import annotations
 
 import json
 import pathlib
-from collections import Counter, defaultdict
-from typing import Dict, List
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Tuple
 
-from .models import MeasureDetail, ReportAnalysis, SectionSummary
-from .semantic import COMPLEXITY_TOKENS
-
-
-def _score_ref(name: str) -> tuple[int, List[str]]:
-    lowered = name.lower()
-    matched = [tok for tok in COMPLEXITY_TOKENS if tok in lowered]
-    score = len(matched)
-    if lowered.startswith(("sum(", "min(", "max(", "average(", "count(", "distinctcount(")):
-        score = max(0, score - 1)
-    return score, matched
+from .aggregate import ReportAggregator
+from .models import ReportAnalysis
 
 
 def load_precomputed_report(report_folder: pathlib.Path) -> ReportAnalysis:
@@ -26,83 +19,105 @@ def load_precomputed_report(report_folder: pathlib.Path) -> ReportAnalysis:
     visual_queries = json.loads(visual_path.read_text(encoding="utf-8")) if visual_path.exists() else []
     semantic_refs = json.loads(refs_path.read_text(encoding="utf-8")) if refs_path.exists() else []
 
-    ref_usage = Counter()
-    ref_sections: Dict[str, set] = defaultdict(set)
-    section_refs: Dict[str, set] = defaultdict(set)
-
+    aggregator = ReportAggregator()
     for q in visual_queries:
-        section = q.get("section", "Unknown")
-        projections = q.get("projections", {})
-        for _, arr in projections.items():
-            if not isinstance(arr, list):
-                continue
-            for item in arr:
-                if isinstance(item, dict) and "queryRef" in item:
-                    ref = str(item["queryRef"])
-                    ref_usage[ref] += 1
-                    ref_sections[ref].add(section)
-                    section_refs[section].add(ref)
-
-    measures: Dict[str, MeasureDetail] = {}
-    for ref, count in ref_usage.items():
-        score, matched = _score_ref(ref)
-        measures[ref] = MeasureDetail(
-            name=ref,
-            source="query_ref",
-            usage_count=count,
-            sections=sorted(ref_sections[ref]),
-            matched_tokens=matched,
-            complexity_score=score,
-        )
-
-    section_summaries = []
-    for section, refs in section_refs.items():
-        section_summaries.append(
-            SectionSummary(
-                section=section,
-                unique_refs=len(refs),
-                complexity_score=sum(_score_ref(r)[0] for r in refs),
-            )
-        )
-    section_summaries.sort(key=lambda s: (-s.complexity_score, -s.unique_refs, s.section.lower()))
-
-    unique_measure_keys = {
-        (r.get("table") or "Unknown", r.get("name") or "Unknown")
-        for r in semantic_refs
-        if r.get("type") == "Measure"
-    }
-    unique_column_keys = {
-        (r.get("table") or "Unknown", r.get("name") or "Unknown")
-        for r in semantic_refs
-        if r.get("type") == "Column"
-    }
-
-    return ReportAnalysis(
-        report_name=report_name,
-        source_mode="demo_precomputed",
-        total_queries=len(visual_queries),
-        total_refs=len(semantic_refs),
-        unique_measures=len(unique_measure_keys),
-        unique_columns=len(unique_column_keys),
-        measures=measures,
-        section_summaries=section_summaries,
-        visual_queries=visual_queries,
-        semantic_references=semantic_refs,
-        has_dax_formulas=False,
-        has_bim=False,
-    )
+        aggregator.add_visual(q)
+    for ref in semantic_refs:
+        aggregator.add_semantic_ref(ref)
+    return aggregator.build(report_name, "demo_precomputed")
 
 
-def load_demo_reports(repo_root: pathlib.Path) -> Dict[str, ReportAnalysis]:
-    base = repo_root / "out" / "powerbi-examples-all" / "report-query-logic"
-    if not base.exists():
+# Process-wide memo of materialized reports: folder -> (file signature, analysis).
+_REPORT_STORE: Dict[str, Tuple[tuple, ReportAnalysis]] = {}
+_STORE_LOCK = threading.Lock()
+
+
+def _demo_base(repo_root: pathlib.Path) -> pathlib.Path:
+    return repo_root / "out" / "powerbi-examples-all" / "report-query-logic"
+
+
+def report_folder_signature(report_folder: pathlib.Path) -> tuple:
+    """(mtime_ns, size) of a report folder's output files; (0, 0) for a missing one."""
+    signature = []
+    for name in ("visual_queries.json", "semantic_references.json"):
+        try:
+            st = (report_folder / name).stat()
+        except OSError:
+            signature.append((0, 0))
+            continue
+        signature.append((st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def get_precomputed_report(report_folder: pathlib.Path) -> ReportAnalysis:
+    """Return the memoized analysis for a folder, reloading it if its files changed."""
+    key = str(report_folder.resolve())
+    signature = report_folder_signature(report_folder)
+    with _STORE_LOCK:
+        cached = _REPORT_STORE.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    analysis = load_precomputed_report(report_folder)
+    with _STORE_LOCK:
+        _REPORT_STORE[key] = (signature, analysis)
+    return analysis
+
+
+@dataclass
+class DemoReportEntry:
+    name: str
+    folder: pathlib.Path
+    summary: dict = field(default_factory=dict)
+
+
+class DemoCatalog(Mapping):
+    """Report name -> ReportAnalysis mapping that materializes reports on first access."""
+
+    def __init__(self, entries: Dict[str, DemoReportEntry]):
+        self._entries = entries
+
+    def __getitem__(self, name: str) -> ReportAnalysis:
+        return get_precomputed_report(self._entries[name].folder)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entry(self, name: str) -> DemoReportEntry:
+        return self._entries[name]
+
+
+def _load_summary_index(base: pathlib.Path) -> Dict[str, dict]:
+    summary_path = base / "summary.json"
+    if not summary_path.exists():
+        return {}
+    try:
+        entries = json.loads(summary_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
         return {}
-    reports: Dict[str, ReportAnalysis] = {}
+    index: Dict[str, dict] = {}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("output"):
+            index[pathlib.PurePosixPath(str(entry["output"]).replace("\\", "/")).name] = entry
+    return index
+
+
+def load_demo_catalog(repo_root: pathlib.Path) -> DemoCatalog:
+    base = _demo_base(repo_root)
+    if not base.exists():
+        return DemoCatalog({})
+    summaries = _load_summary_index(base)
+    entries: Dict[str, DemoReportEntry] = {}
     for folder in sorted(base.iterdir()):
-        if not folder.is_dir():
-            continue
-        if not (folder / "visual_queries.json").exists():
+        # A summary entry alone is not enough: without its outputs the report has nothing to show.
+        if not folder.is_dir() or not (folder / "visual_queries.json").exists():
             continue
-        analysis = load_precomputed_report(folder)
-        reports[analysis.report_name] = analysis
-    return reports
+        entries[folder.name] = DemoReportEntry(name=folder.name, folder=folder, summary=summaries.get(folder.name, {}))
+    return DemoCatalog(entries)
+
+
+def load_demo_reports(repo_root: pathlib.Path) -> Dict[str, ReportAnalysis]:
+    catalog = load_demo_catalog(repo_root)
+    return {name: catalog[name] for name in catalog}
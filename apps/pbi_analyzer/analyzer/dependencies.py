@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from .aggregate import query_refs_from_projections
+from .dax import analyze_formula
+from .models import ReportAnalysis
+
+if TYPE_CHECKING:
+    from .engine import DaxIndex
+
+
+DaxKey = Tuple[str, str]
+
+
+@dataclass
+class Rollup:
+    total_cost: List[int]
+    fan_out: List[int]
+    cycles: List[List[str]] = field(default_factory=list)
+
+
+class DependencyGraph:
+    """Measures and calculated objects linked by the refs in their formulas.
+
+    Nodes are interned to integer ids and edges kept as adjacency lists, so
+    building is linear in nodes plus edges.
+    """
+
+    def __init__(self) -> None:
+        self.ids: Dict[DaxKey, int] = {}
+        self.names: List[str] = []
+        self.own_cost: List[int] = []
+        self.children: List[List[int]] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_node(self, key: DaxKey, name: str, cost: int) -> int:
+        node = self.ids.get(key)
+        if node is None:
+            node = self.ids[key] = len(self.names)
+            self.names.append(name)
+            self.own_cost.append(cost)
+            self.children.append([])
+        return node
+
+    def rollup(self) -> Rollup:
+        """Transitive cost per node: own cost plus the own cost of every node it reaches.
+
+        An iterative Tarjan pass finishes strongly connected components
+        dependencies-first; each component's reachable set is then one integer
+        bitset OR-ed from its dependencies', so a dependency shared by several
+        paths is counted once. A cycle's members share one total covering the
+        whole component.
+
+        Component costs are kept bit-sliced (one bitset per bit of the cost), so
+        a component's total is a popcount per slice of its reachable set taken
+        when the component finishes, rather than a walk over its members. Work
+        and memory still grow with components times reachable components:
+        quadratic in the worst case, but in C-level bitset operations.
+        """
+        count = len(self.names)
+        children = self.children
+        order = [-1] * count
+        low = [0] * count
+        component = [-1] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        cycles: List[List[str]] = []
+        counter = 0
+        components = 0
+        reach: List[int] = []  # bitset of components reachable from each component, itself included
+        cost_slices: List[int] = []  # cost_slices[k]: components whose own cost has bit k set
+        component_total: List[int] = []
+
+        for root in range(count):
+            if order[root] != -1:
+                continue
+            work: List[Tuple[int, int]] = [(root, 0)]
+            while work:
+                node, pos = work.pop()
+                if pos == 0:
+                    order[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack[node] = True
+                edges = children[node]
+                if pos < len(edges):
+                    child = edges[pos]
+                    work.append((node, pos + 1))
+                    if order[child] == -1:
+                        work.append((child, 0))
+                    elif on_stack[child]:
+                        low[node] = min(low[node], order[child])
+                    continue
+
+                if low[node] == order[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = components
+                        members.append(member)
+                        if member == node:
+                            break
+                    reachable = 1 << components
+                    for member in members:
+                        for child in children[member]:
+                            if component[child] != components:
+                                reachable |= reach[component[child]]
+                    reach.append(reachable)
+                    cost = sum(self.own_cost[m] for m in members)
+                    cost_slices.extend([0] * (cost.bit_length() - len(cost_slices)))
+                    for bit in range(cost.bit_length()):
+                        if cost >> bit & 1:
+                            cost_slices[bit] |= 1 << components
+                    component_total.append(
+                        sum((reachable & costed).bit_count() << bit for bit, costed in enumerate(cost_slices))
+                    )
+                    if len(members) > 1 or node in children[node]:
+                        cycles.append(sorted(self.names[m] for m in members))
+                    components += 1
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+        total = [component_total[c] for c in component]
+        return Rollup(total_cost=total, fan_out=[len(edges) for edges in children], cycles=sorted(cycles))
+
+
+def build_dependency_graph(index: "DaxIndex") -> DependencyGraph:
+    graph = DependencyGraph()
+    for key, detail in index.by_key.items():
+        cost = analyze_formula(detail.dax_formula).score if detail.dax_formula else 0
+        graph.add_node(key, detail.name, cost)
+
+    for key, detail in index.by_key.items():
+        if not detail.dax_formula:
+            continue
+        metrics = analyze_formula(detail.dax_formula)
+        source = graph.ids[key]
+        targets: Set[int] = set()
+        edges = graph.children[source]
+        refs = [(key[0], name, False) for name in metrics.measure_refs]
+        refs.extend((table, column, True) for table, column in metrics.column_refs)
+        for table, name, qualified in refs:
+            target_key = index.resolve_formula_ref(table, name, qualified)
+            if target_key is None:
+                continue
+            target = graph.ids[target_key]
+            if target not in targets:
+                targets.add(target)
+                edges.append(target)
+    return graph
+
+
+def attribute_costs(analysis: ReportAnalysis, rollup: Rollup, nodes: Dict[str, Optional[int]]) -> None:
+    """Write rolled-up costs onto measures, sections and visuals.
+
+    `nodes` maps measure keys in `analysis.measures` to graph ids (None when
+    the measure has no formula); those fall back to their own score.
+    """
+    for key, measure in analysis.measures.items():
+        node = nodes.get(key)
+        if node is None:
+            measure.rolled_up_cost = measure.complexity_score
+            measure.fan_out = 0
+        else:
+            measure.rolled_up_cost = rollup.total_cost[node]
+            measure.fan_out = rollup.fan_out[node]
+
+    section_costs: Dict[str, int] = {}
+    for measure in analysis.measures.values():
+        for section in measure.sections:
+            section_costs[section] = section_costs.get(section, 0) + measure.rolled_up_cost
+    # New summaries rather than in-place writes: copies of a shared analysis may share these objects.
+    analysis.section_summaries = [
+        replace(summary, rolled_up_cost=section_costs.get(summary.section, 0))
+        for summary in analysis.section_summaries
+    ]
+
+    visual_costs = []
+    for visual in analysis.visual_queries:
+        refs = dict.fromkeys(query_refs_from_projections(visual.get("projections", {})))
+        visual_costs.append(
+            sum(analysis.measures[ref].rolled_up_cost for ref in refs if ref in analysis.measures)
+        )
+    analysis.visual_costs = visual_costs
+    analysis.dependency_cycles = rollup.cycles
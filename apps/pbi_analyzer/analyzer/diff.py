@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Tuple, Union
+
+from .artifacts import parse_artifact_folder, parse_bim_file
+from .codec import decode_analysis
+from .demo_loader import load_precomputed_report
+from .engine import merge_dax_into_analysis
+from .models import MeasureDetail, ReportAnalysis, analysis_from_dict
+from .semantic import analyze_pbix_path
+
+
+BUDGET_METRICS = ("complexity_score", "rolled_up_cost")
+
+RefKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]  # (type, table, name, section)
+
+
+@dataclass
+class MeasureChange:
+    name: str
+    before_score: int
+    after_score: int
+    before_usage: int
+    after_usage: int
+    formula_changed: bool
+    before_formula: str = ""
+    after_formula: str = ""
+
+
+@dataclass
+class SectionDelta:
+    section: str
+    before_score: int
+    after_score: int
+    before_rolled_up: int
+    after_rolled_up: int
+
+    @property
+    def delta(self) -> int:
+        return self.after_score - self.before_score
+
+    def value(self, metric: str, after: bool = True) -> int:
+        if metric == "rolled_up_cost":
+            return self.after_rolled_up if after else self.before_rolled_up
+        return self.after_score if after else self.before_score
+
+
+@dataclass
+class ReportDiff:
+    before: str
+    after: str
+    added_measures: List[str] = field(default_factory=list)
+    removed_measures: List[str] = field(default_factory=list)
+    changed_measures: List[MeasureChange] = field(default_factory=list)
+    section_deltas: List[SectionDelta] = field(default_factory=list)
+    added_references: List[dict] = field(default_factory=list)
+    removed_references: List[dict] = field(default_factory=list)
+
+    @property
+    def formula_changes(self) -> List[MeasureChange]:
+        return [c for c in self.changed_measures if c.formula_changed]
+
+    def budget_violations(self, budget: int, metric: str = "complexity_score") -> List[SectionDelta]:
+        """Sections over `budget` that got worse in this change (new sections start at 0)."""
+        return [
+            d
+            for d in self.section_deltas
+            if d.value(metric) > budget and d.value(metric) > d.value(metric, after=False)
+        ]
+
+    def is_empty(self) -> bool:
+        return not (
+            self.added_measures
+            or self.removed_measures
+            or self.changed_measures
+            or self.section_deltas
+            or self.added_references
+            or self.removed_references
+        )
+
+
+def _formula_hash(formula: str) -> bytes:
+    return hashlib.blake2b(formula.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _measure_signature(measure: MeasureDetail) -> tuple:
+    return (measure.complexity_score, measure.usage_count, _formula_hash(measure.dax_formula))
+
+
+def _ref_dict(key: RefKey) -> dict:
+    return {"type": key[0], "table": key[1], "name": key[2], "section": key[3]}
+
+
+def _sort_key(key: RefKey) -> tuple:
+    return tuple(part or "" for part in key)
+
+
+def diff_analyses(before: ReportAnalysis, after: ReportAnalysis) -> ReportDiff:
+    """Compare two analyses with set operations on hashed keys; near-linear in their size."""
+    result = ReportDiff(before=before.report_name, after=after.report_name)
+
+    before_names = before.measures.keys()
+    after_names = after.measures.keys()
+    result.added_measures = sorted(after_names - before_names)
+    result.removed_measures = sorted(before_names - after_names)
+    for name in sorted(before_names & after_names):
+        old, new = before.measures[name], after.measures[name]
+        if _measure_signature(old) == _measure_signature(new):
+            continue
+        formula_changed = old.dax_formula != new.dax_formula
+        result.changed_measures.append(
+            MeasureChange(
+                name=name,
+                before_score=old.complexity_score,
+                after_score=new.complexity_score,
+                before_usage=old.usage_count,
+                after_usage=new.usage_count,
+                formula_changed=formula_changed,
+                before_formula=old.dax_formula if formula_changed else "",
+                after_formula=new.dax_formula if formula_changed else "",
+            )
+        )
+
+    old_sections = {s.section: s for s in before.section_summaries}
+    new_sections = {s.section: s for s in after.section_summaries}
+    for section in sorted(old_sections.keys() | new_sections.keys()):
+        old, new = old_sections.get(section), new_sections.get(section)
+        delta = SectionDelta(
+            section=section,
+            before_score=old.complexity_score if old else 0,
+            after_score=new.complexity_score if new else 0,
+            before_rolled_up=old.rolled_up_cost if old else 0,
+            after_rolled_up=new.rolled_up_cost if new else 0,
+        )
+        unchanged = (delta.before_score, delta.before_rolled_up) == (delta.after_score, delta.after_rolled_up)
+        if old is None or new is None or not unchanged:
+            result.section_deltas.append(delta)
+    result.section_deltas.sort(key=lambda d: (-abs(d.delta), d.section.lower()))
+
+    old_refs = before.semantic_references.distinct_rows()
+    new_refs = after.semantic_references.distinct_rows()
+    result.added_references = [_ref_dict(k) for k in sorted(new_refs - old_refs, key=_sort_key)]
+    result.removed_references = [_ref_dict(k) for k in sorted(old_refs - new_refs, key=_sort_key)]
+    return result
+
+
+def diff_to_dict(diff: ReportDiff) -> dict:
+    payload = asdict(diff)
+    for delta, row in zip(diff.section_deltas, payload["section_deltas"]):
+        row["delta"] = delta.delta
+    return payload
+
+
+def build_markdown_diff(
+    diff: ReportDiff, budget: Optional[int] = None, metric: str = "complexity_score", limit: int = 50
+) -> str:
+    lines = [
+        f"# PowerBI Analysis Diff - {diff.before} -> {diff.after}",
+        "",
+        f"- Measures added: {len(diff.added_measures)}",
+        f"- Measures removed: {len(diff.removed_measures)}",
+        f"- Measures changed: {len(diff.changed_measures)} ({len(diff.formula_changes)} DAX formula change(s))",
+        f"- Sections changed: {len(diff.section_deltas)}",
+        f"- Semantic references added: {len(diff.added_references)}",
+        f"- Semantic references removed: {len(diff.removed_references)}",
+    ]
+
+    if budget is not None:
+        violations = diff.budget_violations(budget, metric)
+        lines.extend(["", f"## Budget ({metric} <= {budget})"])
+        if not violations:
+            lines.append("- OK")
+        for d in violations:
+            lines.append(f"- `{d.section}` | {metric}={d.value(metric, after=False)} -> {d.value(metric)} (over budget)")
+
+    if diff.section_deltas:
+        lines.extend(["", "## Section Complexity Deltas"])
+        for d in diff.section_deltas[:limit]:
+            lines.append(
+                f"- `{d.section}` | complexity_score={d.before_score} -> {d.after_score} ({d.delta:+d})"
+                f" | rolled_up_cost={d.before_rolled_up} -> {d.after_rolled_up}"
+            )
+
+    sections = [
+        ("Added Measures", [f"- `{name}`" for name in diff.added_measures]),
+        ("Removed Measures", [f"- `{name}`" for name in diff.removed_measures]),
+        (
+            "Changed Measures",
+            [
+                f"- `{c.name}` | score={c.before_score} -> {c.after_score} | usage={c.before_usage} -> {c.after_usage}"
+                + (" | DAX changed" if c.formula_changed else "")
+                for c in diff.changed_measures
+            ],
+        ),
+        (
+            "New Semantic References",
+            [f"- `{r['table'] or '?'}.{r['name']}` ({r['type']}) in `{r['section']}`" for r in diff.added_references],
+        ),
+    ]
+    for title, rows in sections:
+        if not rows:
+            continue
+        lines.extend(["", f"## {title}"])
+        lines.extend(rows[:limit])
+        if len(rows) > limit:
+            lines.append(f"- ... {len(rows) - limit} more")
+    return "\n".join(lines)
+
+
+def _apply_artifacts(analysis: ReportAnalysis, artifacts: Optional[str]) -> ReportAnalysis:
+    if not artifacts:
+        return analysis
+    path = pathlib.Path(artifacts)
+    parsed = parse_bim_file(str(path)) if path.suffix.lower() == ".bim" else parse_artifact_folder(str(path))
+    return merge_dax_into_analysis(analysis, parsed.measures, parsed.has_bim)
+
+
+def load_analysis(path: Union[str, pathlib.Path], artifacts: Optional[str] = None) -> ReportAnalysis:
+    """Load a PBIX, a saved analysis JSON, a cached `.pbia` analysis, or a report-query-logic output folder."""
+    path = pathlib.Path(path)
+    if path.is_dir():
+        analysis = load_precomputed_report(path)
+    elif path.suffix.lower() == ".pbia":
+        analysis = decode_analysis(path.read_bytes())
+    elif path.suffix.lower() == ".json":
+        analysis = analysis_from_dict(json.loads(path.read_text(encoding="utf-8")))
+    else:
+        analysis = analyze_pbix_path(path)
+    return _apply_artifacts(analysis, artifacts)
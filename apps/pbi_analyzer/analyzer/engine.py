@@ -1,87 +1,172 @@
 from __future__ import annotations
 
 import pathlib
-from typing import Dict
-
+import re
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .dax import formula_score
+from .dependencies import attribute_costs, build_dependency_graph
+from .instrument import AnyProfiler, active
 from .models import MeasureDetail, ReportAnalysis
 
 
+_AGGREGATE_WRAPPER = re.compile(r"^\s*[A-Za-z]+\((.*)\)\s*$", re.DOTALL)
+
+DaxKey = Tuple[str, str]
+
+
 def _normalize_for_match(value: str) -> str:
-    return (
-        value.lower()
-        .replace("sum(", "")
-        .replace(")", "")
-        .replace("[", ".")
-        .replace("]", "")
-        .replace("/", ".")
-        .replace("_", "")
-        .replace(" ", "")
-    )
-
-
-def _variants(value: str) -> set[str]:
-    base = value.lower()
-    variants = {
-        base,
-        base.replace("sum(", "").replace(")", ""),
-        base.replace("[", ".").replace("]", ""),
-        base.replace("/", "."),
-        base.replace("_", ""),
-        base.replace(" ", ""),
-    }
-    combined = set()
-    for v in variants:
-        combined.add(v)
-        combined.add(
-            v.replace("sum(", "")
-            .replace(")", "")
-            .replace("[", ".")
-            .replace("]", "")
-            .replace("/", ".")
-            .replace("_", "")
-            .replace(" ", "")
-        )
-    return {x for x in combined if x}
+    return value.lower().replace("_", "").replace(" ", "")
+
+
+def _dax_key(name: str) -> DaxKey:
+    # Artifact names keep their folder context, e.g. "legacy/Model/tables/<table>/measures/<name>".
+    # The extractor percent-encodes reserved characters ("/" as "%2F"), so decode after splitting.
+    parts = [urllib.parse.unquote(p) for p in name.replace("\\", "/").split("/") if p]
+    if len(parts) >= 4 and parts[-4].lower() == "tables" and parts[-2].lower() in ("measures", "columns"):
+        table, obj = parts[-3], parts[-1]
+    elif len(parts) >= 3 and parts[-3].lower() == "tables" and parts[-1].lower() == "table":
+        table, obj = parts[-2], parts[-2]
+    elif len(parts) >= 2:
+        table, obj = parts[-2], parts[-1]
+    else:
+        table, obj = "", name
+    return _normalize_for_match(table), _normalize_for_match(obj)
+
+
+def _query_ref_keys(ref: str) -> List[DaxKey]:
+    match = _AGGREGATE_WRAPPER.match(ref)
+    inner = match.group(1) if match else ref
+    # Table and object names may both contain dots, so try every split point.
+    keys = []
+    dot = inner.find(".")
+    while dot != -1:
+        keys.append((_normalize_for_match(inner[:dot]), _normalize_for_match(inner[dot + 1 :])))
+        dot = inner.find(".", dot + 1)
+    if not keys:
+        keys.append(("", _normalize_for_match(inner)))
+    return keys
+
+
+@dataclass
+class DaxIndex:
+    by_key: Dict[DaxKey, MeasureDetail] = field(default_factory=dict)
+    by_object: Dict[str, List[DaxKey]] = field(default_factory=dict)
+    ambiguities: Dict[str, List[str]] = field(default_factory=dict)
+
+    def resolve(self, ref: str) -> Optional[MeasureDetail]:
+        keys = _query_ref_keys(ref)
+        for key in keys:
+            detail = self.by_key.get(key)
+            if detail is not None:
+                return detail
+        table, obj = keys[0]
+        if table:
+            # Artifacts without table folders can still satisfy a qualified ref.
+            return self.by_key.get(("", obj))
+        candidates = self.by_object.get(obj, [])
+        if len(candidates) == 1:
+            return self.by_key[candidates[0]]
+        if len(candidates) > 1:
+            self.ambiguities[ref] = sorted(self.by_key[k].name for k in candidates)
+        return None
+
+    def resolve_formula_ref(self, table: str, obj: str, qualified: bool) -> Optional[DaxKey]:
+        """Key of an object referenced from a formula in (or as) `table`.
+
+        `Table[Col]` refs are `qualified` and must match exactly; bare `[Name]`
+        refs prefer the referencing table, then any unique object of that name.
+        """
+        key = (_normalize_for_match(table), _normalize_for_match(obj))
+        if key in self.by_key:
+            return key
+        if qualified:
+            return None
+        candidates = self.by_object.get(key[1], [])
+        return candidates[0] if len(candidates) == 1 else None
+
+
+def _apply_formula_score(measure: MeasureDetail) -> None:
+    # A real formula beats guessing complexity from the measure name.
+    if measure.dax_formula:
+        score, tokens = formula_score(measure.dax_formula)
+        measure.complexity_score = score
+        measure.matched_tokens = tokens
+
+
+def build_dax_index(dax_measures: Dict[str, MeasureDetail]) -> DaxIndex:
+    index = DaxIndex()
+    for name, detail in dax_measures.items():
+        key = _dax_key(name)
+        existing = index.by_key.get(key)
+        if existing is not None:
+            # Keep the first definition and report the collision instead of overwriting it.
+            label = f"{key[0]}.{key[1]}" if key[0] else key[1]
+            index.ambiguities.setdefault(label, [existing.name]).append(detail.name)
+            continue
+        index.by_key[key] = detail
+        index.by_object.setdefault(key[1], []).append(key)
+    return index
 
 
 def merge_dax_into_analysis(
-    analysis: ReportAnalysis, dax_measures: Dict[str, MeasureDetail], has_bim: bool
+    analysis: ReportAnalysis,
+    dax_measures: Dict[str, MeasureDetail],
+    has_bim: bool,
+    profiler: Optional[AnyProfiler] = None,
 ) -> ReportAnalysis:
     if not dax_measures:
         analysis.has_bim = has_bim
         return analysis
 
+    profiler = active(profiler)
     # Keep existing semantic rows, enrich when possible.
-    semantic_items = list(analysis.measures.items())
-    dax_lookup: Dict[str, MeasureDetail] = {}
-    for name, detail in dax_measures.items():
-        for v in _variants(name):
-            dax_lookup[v] = detail
-    used_dax_keys = set()
-
-    for key, measure in semantic_items:
-        matched = None
-        for candidate in _variants(key):
-            if candidate in dax_lookup:
-                matched = candidate
-                break
-        if matched is not None:
-            dax_detail = dax_lookup[matched]
+    with profiler.span("dax_index"):
+        index = build_dax_index(dax_measures)
+    with profiler.span("dependency_graph"):
+        graph = build_dependency_graph(index)
+    used_dax_names = set()
+    nodes: Dict[str, Optional[int]] = {}
+
+    def node_of(detail: MeasureDetail) -> Optional[int]:
+        key = _dax_key(detail.name)
+        return graph.ids[key] if index.by_key.get(key) is detail else None
+
+    with profiler.span("dax_match"):
+        for key, measure in list(analysis.measures.items()):
+            dax_detail = index.resolve(key)
+            if dax_detail is None:
+                continue
             measure.source = "dax"
             measure.dax_formula = dax_detail.dax_formula
-            used_dax_keys.add(matched)
-
-    # Add unmatched dax measures so user sees complete formulas present in artifacts.
-    for norm_key, dax_detail in dax_lookup.items():
-        if norm_key in used_dax_keys:
-            continue
-        if dax_detail.name in analysis.measures:
-            continue
-        analysis.measures[dax_detail.name] = dax_detail
-
+            _apply_formula_score(measure)
+            used_dax_names.add(dax_detail.name)
+            nodes[key] = node_of(dax_detail)
+        profiler.count("measures_matched", len(nodes))
+
+        # Add unmatched dax measures so user sees complete formulas present in artifacts.
+        for dax_detail in dax_measures.values():
+            if dax_detail.name in used_dax_names:
+                continue
+            if dax_detail.name in analysis.measures:
+                continue
+            _apply_formula_score(dax_detail)
+            analysis.measures[dax_detail.name] = dax_detail
+            nodes[dax_detail.name] = node_of(dax_detail)
+        profiler.count("dax_only_measures", len(nodes) - len(used_dax_names))
+
+    with profiler.span("cost_rollup"):
+        attribute_costs(analysis, graph.rollup(), nodes)
+    if profiler.enabled:
+        analysis.diagnostics = profiler.to_dict()
+
+    analysis.dax_ambiguities = index.ambiguities
     analysis.has_dax_formulas = True
     analysis.has_bim = has_bim
     analysis.source_mode = "dax_enriched"
+    analysis.invalidate_derived()
     return analysis
 
 
@@ -109,7 +194,8 @@ def build_markdown_summary(analysis: ReportAnalysis) -> str:
     lines.extend(["", "## Section Logic Density"])
     for sec in analysis.section_summaries[:20]:
         lines.append(
-            f"- `{sec.section}` | complexity_score={sec.complexity_score} | unique_refs={sec.unique_refs}"
+            f"- `{sec.section}` | complexity_score={sec.complexity_score} | rolled_up_cost={sec.rolled_up_cost}"
+            f" | unique_refs={sec.unique_refs}"
         )
     return "\n".join(lines)
 
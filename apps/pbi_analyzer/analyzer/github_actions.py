@@ -1,42 +1,247 @@
 from __future__ import annotations
 
+import datetime
+import email.utils
+import hashlib
+import http.client
 import json
-import urllib.error
-import urllib.request
-from typing import Any, Dict, Optional
+import math
+import tempfile
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
 
 
 GITHUB_API_BASE = "https://api.github.com"
 
+_RETRY_STATUSES = (500, 502, 503, 504)
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
 
-def _api_request(
-    method: str,
-    url: str,
-    token: str,
-    payload: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
-    data = None
-    if payload is not None:
-        data = json.dumps(payload).encode("utf-8")
 
-    req = urllib.request.Request(url, data=data, method=method.upper())
-    req.add_header("Accept", "application/vnd.github+json")
-    req.add_header("Authorization", f"Bearer {token}")
-    req.add_header("X-GitHub-Api-Version", "2022-11-28")
-    if data is not None:
-        req.add_header("Content-Type", "application/json")
+def _finite_float(value: str) -> Optional[float]:
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
 
+def retry_after_seconds(value: str, now: Optional[float] = None) -> Optional[float]:
+    """Delay from a Retry-After header: delay-seconds or an HTTP-date (RFC 9110); None when unparseable."""
+    seconds = _finite_float(value)
+    if seconds is not None:
+        return max(0.0, seconds)
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            body = resp.read().decode("utf-8").strip()
-            if not body:
-                return {}
-            return json.loads(body)
-    except urllib.error.HTTPError as exc:
-        detail = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"GitHub API {exc.code}: {detail}") from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"GitHub API request failed: {exc}") from exc
+        when = email.utils.parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        # "-0000" dates parse naive but are UTC.
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class GitHubClient:
+    """GitHub REST client over one keep-alive connection.
+
+    GET responses are cached by URL with their ETag and revalidated with
+    If-None-Match, so an unchanged resource costs a 304 (which GitHub does not
+    count against the rate limit). Rate-limited responses wait for the reset
+    (up to `max_wait` seconds) and 5xx responses back off exponentially.
+    Safe to share between the UI and a poller thread: the lock covers one
+    exchange on the shared connection, never a backoff sleep or a download.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = GITHUB_API_BASE,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        max_wait: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.rate_limit_remaining: Optional[int] = None
+        self.stats = {"requests": 0, "not_modified": 0, "connections": 0, "retries": 0}
+        self._scheme = parsed.scheme
+        self._host = parsed.netloc
+        self._base_path = parsed.path.rstrip("/")
+        self._sleep = sleep
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._etags: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            factory = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            self._conn = factory(self._host, timeout=self.timeout)
+            self.stats["connections"] += 1
+        return self._conn
+
+    def _path(self, url: str) -> str:
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url) :]
+        return self._base_path + (url if url.startswith("/") else f"/{url}")
+
+    def _send(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]):
+        """Send one request and return the unread response.
+
+        A keep-alive socket the server already closed is reopened once. Callers
+        must read the response fully before the connection is used again.
+        """
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except (OSError, http.client.HTTPException):
+                # Nothing reached the server, so resending is safe for any method.
+                conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+                continue
+            try:
+                return conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                self._conn = None
+                if attempt or method != "GET":
+                    raise
+        raise AssertionError("unreachable")
+
+    def _retry_delay(self, status: int, headers: http.client.HTTPMessage, attempt: int) -> Optional[float]:
+        backoff = 0.5 * (2**attempt)
+        if status in (403, 429):
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None:
+                delay = retry_after_seconds(retry_after)
+                return backoff if delay is None else delay
+            if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+                reset = _finite_float(headers["X-RateLimit-Reset"])
+                return backoff if reset is None else max(0.0, reset - time.time()) + 1.0
+            return None
+        if status in _RETRY_STATUSES:
+            return backoff
+        return None
+
+    def request(self, method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """JSON body of a call to `url` (absolute, or a path under base_url); {} when empty.
+
+        Cached GET payloads are shared, so treat the result as read-only.
+        """
+        method = method.upper()
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "pbi-analyzer",
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        path = self._path(url)
+
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                cached = self._etags.get(path) if method == "GET" else None
+                if cached is not None:
+                    headers["If-None-Match"] = cached[0]
+                try:
+                    response = self._send(method, path, body, headers)
+                    raw = response.read()
+                except (OSError, http.client.HTTPException) as exc:
+                    raise RuntimeError(f"GitHub API request failed: {exc}") from exc
+                self.stats["requests"] += 1
+                remaining = response.getheader("X-RateLimit-Remaining")
+                if remaining is not None and remaining.isdigit():
+                    self.rate_limit_remaining = int(remaining)
+
+                if response.status == 304 and cached is not None:
+                    self.stats["not_modified"] += 1
+                    return cached[1]
+                if response.status < 400:
+                    text = raw.decode("utf-8").strip()
+                    result = json.loads(text) if text else {}
+                    etag = response.getheader("ETag")
+                    if method == "GET" and etag:
+                        self._etags[path] = (etag, result)
+                    return result
+
+                delay = self._retry_delay(response.status, response.headers, attempt)
+                if delay is None or delay > self.max_wait or attempt == self.max_retries:
+                    detail = raw.decode("utf-8", errors="replace")
+                    raise RuntimeError(f"GitHub API {response.status}: {detail}")
+                self.stats["retries"] += 1
+            # Other callers keep using the connection while this one backs off.
+            self._sleep(delay)
+        raise AssertionError("unreachable")
+
+    def download(self, url: str, sink: IO[bytes], chunk_size: int = 1 << 20, max_redirects: int = 5) -> int:
+        """Stream a (possibly redirected) download into `sink` in chunks; returns bytes written.
+
+        Each hop uses its own one-off connection, so a long transfer never holds
+        the shared API connection. Artifact archives redirect to short-lived
+        storage URLs on another host, which are fetched without the API token.
+        """
+        target = url if urllib.parse.urlsplit(url).netloc else f"{self._scheme}://{self._host}{self._path(url)}"
+        for _ in range(max_redirects + 1):
+            split = urllib.parse.urlsplit(target)
+            path = urllib.parse.urlunsplit(("", "", split.path, split.query, "")) or "/"
+            headers = {"User-Agent": "pbi-analyzer"}
+            if (split.scheme, split.netloc) == (self._scheme, self._host):
+                headers["Authorization"] = f"Bearer {self.token}"
+            factory = http.client.HTTPSConnection if split.scheme == "https" else http.client.HTTPConnection
+            conn = factory(split.netloc, timeout=self.timeout)
+            try:
+                try:
+                    conn.request("GET", path, headers=headers)
+                    response = conn.getresponse()
+                except (OSError, http.client.HTTPException) as exc:
+                    raise RuntimeError(f"GitHub download failed: {exc}") from exc
+                if response.status in (301, 302, 303, 307, 308):
+                    target = urllib.parse.urljoin(target, response.getheader("Location", ""))
+                    continue
+                if response.status >= 400:
+                    detail = response.read().decode("utf-8", errors="replace")
+                    raise RuntimeError(f"GitHub download {response.status}: {detail}")
+                written = 0
+                while True:
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        return written
+                    sink.write(chunk)
+                    written += len(chunk)
+            finally:
+                conn.close()
+        raise RuntimeError(f"GitHub download exceeded {max_redirects} redirects: {url}")
+
+
+_CLIENTS: Dict[str, GitHubClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def client_for(token: str) -> GitHubClient:
+    """Process-wide client per token, so module-level calls share connections and ETags."""
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = GitHubClient(token)
+        return client
 
 
 def trigger_extract_workflow(
@@ -47,8 +252,9 @@ def trigger_extract_workflow(
     run_all: bool,
     pbix_path: str,
     model_serialization: str,
+    client: Optional[GitHubClient] = None,
 ) -> None:
-    url = f"{GITHUB_API_BASE}/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
+    url = f"/repos/{repo}/actions/workflows/{workflow_file}/dispatches"
     payload = {
         "ref": ref,
         "inputs": {
@@ -57,19 +263,158 @@ def trigger_extract_workflow(
             "modelSerialization": model_serialization,
         },
     }
-    _api_request("POST", url, token, payload=payload)
+    (client or client_for(token)).request("POST", url, payload=payload)
 
 
-def latest_workflow_run(repo: str, workflow_file: str, token: str) -> Dict[str, Any]:
-    url = (
-        f"{GITHUB_API_BASE}/repos/{repo}/actions/workflows/{workflow_file}/runs"
-        "?per_page=1"
-    )
-    payload = _api_request("GET", url, token)
+def latest_workflow_run(
+    repo: str, workflow_file: str, token: str, client: Optional[GitHubClient] = None
+) -> Dict[str, Any]:
+    url = f"/repos/{repo}/actions/workflows/{workflow_file}/runs?per_page=1"
+    payload = (client or client_for(token)).request("GET", url)
     runs = payload.get("workflow_runs", [])
     return runs[0] if runs else {}
 
 
-def artifacts_for_run(repo: str, run_id: int, token: str) -> Dict[str, Any]:
-    url = f"{GITHUB_API_BASE}/repos/{repo}/actions/runs/{run_id}/artifacts"
-    return _api_request("GET", url, token)
+def artifacts_for_run(repo: str, run_id: int, token: str, client: Optional[GitHubClient] = None) -> Dict[str, Any]:
+    url = f"/repos/{repo}/actions/runs/{run_id}/artifacts"
+    return (client or client_for(token)).request("GET", url)
+
+
+def _run_version(run: Dict[str, Any]) -> Tuple[Any, Any]:
+    return run.get("id"), run.get("updated_at")
+
+
+class ArtifactSpool(tempfile.SpooledTemporaryFile):
+    """Spooled download target; `spilled` turns True once it has rolled over to a disk file."""
+
+    def __init__(self, max_size: int):
+        super().__init__(max_size=max_size)
+        self.spilled = False
+
+    def rollover(self) -> None:
+        super().rollover()
+        self.spilled = True
+
+
+def download_run_artifact(
+    repo: str,
+    run_id: int,
+    token: str,
+    name: str = "pbix-extract-artifacts",
+    client: Optional[GitHubClient] = None,
+    max_memory: int = 16 * 1024 * 1024,
+) -> ArtifactSpool:
+    """Download one artifact archive of a run into a spooled temp file, rewound for reading.
+
+    Up to `max_memory` bytes stay in memory; larger archives spill to disk.
+    The caller owns (and should close) the returned file.
+    """
+    client = client or client_for(token)
+    listing = artifacts_for_run(repo, run_id, token, client=client)
+    matches = [a for a in listing.get("artifacts", []) if a.get("name") == name and not a.get("expired")]
+    if not matches:
+        raise RuntimeError(f"Run {run_id} has no unexpired artifact named {name!r}.")
+    url = matches[0].get("archive_download_url") or f"/repos/{repo}/actions/artifacts/{matches[0]['id']}/zip"
+    spool = ArtifactSpool(max_memory)
+    try:
+        client.download(url, spool)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+@dataclass
+class RunStatus:
+    run: Dict[str, Any] = field(default_factory=dict)
+    artifacts: List[str] = field(default_factory=list)
+    checked_at: float = 0.0
+    error: str = ""
+
+
+class RunPoller:
+    """Background thread that polls the latest workflow run and publishes a RunStatus.
+
+    The UI reads `status()` on each rerun instead of sleeping; artifacts are
+    re-fetched only when the run changes. The thread stops by itself once
+    `status()` has not been called for `idle_timeout` seconds (an abandoned
+    browser tab), and `start()` resumes it.
+    """
+
+    def __init__(
+        self,
+        client: GitHubClient,
+        repo: str,
+        workflow_file: str,
+        interval: float = 15.0,
+        idle_timeout: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.repo = repo
+        self.workflow_file = workflow_file
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._last_read = clock()
+        self._status: Optional[RunStatus] = None
+        self._status_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "RunPoller":
+        if not self.running:
+            self._last_read = self._clock()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="github-run-poller", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self) -> Optional[RunStatus]:
+        with self._status_lock:
+            self._last_read = self._clock()
+            return self._status
+
+    def idle(self) -> bool:
+        return self._clock() - self._last_read > self.idle_timeout
+
+    def poll_once(self) -> RunStatus:
+        with self._status_lock:
+            previous = self._status
+        try:
+            run = latest_workflow_run(self.repo, self.workflow_file, self.client.token, client=self.client)
+            artifacts: List[str] = []
+            if run.get("id"):
+                if previous is not None and not previous.error and _run_version(run) == _run_version(previous.run):
+                    artifacts = previous.artifacts
+                else:
+                    listing = artifacts_for_run(self.repo, int(run["id"]), self.client.token, client=self.client)
+                    artifacts = [a.get("name") for a in listing.get("artifacts", [])]
+            status = RunStatus(run=run, artifacts=artifacts, checked_at=time.time())
+        except Exception as exc:
+            # Keep the last good run visible alongside the error.
+            status = RunStatus(
+                run=previous.run if previous else {},
+                artifacts=previous.artifacts if previous else [],
+                checked_at=time.time(),
+                error=str(exc),
+            )
+        with self._status_lock:
+            self._status = status
+        return status
+
+    def _loop(self) -> None:
+        while not self._stop.is_set() and not self.idle():
+            self.poll_once()
+            self._stop.wait(self.interval)
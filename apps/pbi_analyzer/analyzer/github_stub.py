@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+import urllib.parse
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .artifacts import parse_artifact_zip
+from .github_actions import GitHubClient, download_run_artifact, latest_workflow_run
+
+
+def stub_artifact_zip(measures: Dict[str, str]) -> bytes:
+    """An artifact archive shaped like the extract workflow's: Model/tables/<table>/measures/<name>.dax."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, formula in measures.items():
+            zf.writestr(f"Model/tables/Sales/measures/{name}.dax", formula)
+    return buffer.getvalue()
+
+
+class StubGitHub:
+    """Local stand-in for the GitHub Actions endpoints the app calls.
+
+    Serves the latest run of any workflow (with an ETag), a run's artifact
+    listing, and the archive download, which redirects to a "storage" URL on
+    another host name (localhost vs 127.0.0.1) the way GitHub redirects to
+    blob storage. Requests are recorded for inspection.
+    """
+
+    def __init__(self, token: str, archive: bytes, run_id: int = 42, artifact: str = "pbix-extract-artifacts"):
+        self.token = token
+        self.archive = archive
+        self.run = {"id": run_id, "status": "completed", "conclusion": "success", "updated_at": "2025-01-01T00:00:00Z"}
+        self.artifact = artifact
+        self.requests: List[dict] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                return None
+
+            def do_GET(self) -> None:
+                stub._handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "StubGitHub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="github-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, body: bytes = b"", headers=None) -> None:
+        handler.send_response(status)
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        path = urllib.parse.urlsplit(handler.path).path
+        auth = handler.headers.get("Authorization")
+        self.requests.append({"path": path, "host": handler.headers.get("Host"), "authorization": auth})
+        parts = path.strip("/").split("/")
+        if parts[0] == "storage":
+            # Pre-signed storage URLs must be fetched without the API token.
+            if auth:
+                return self._send(handler, 400, b"unexpected Authorization header")
+            return self._send(handler, 200, self.archive, {"Content-Type": "application/zip"})
+        if auth != f"Bearer {self.token}":
+            return self._send(handler, 401, b'{"message": "Bad credentials"}')
+        if path.endswith("/runs"):
+            etag = f'"{self.run["updated_at"]}"'
+            if handler.headers.get("If-None-Match") == etag:
+                return self._send(handler, 304, headers={"ETag": etag})
+            body = json.dumps({"workflow_runs": [self.run]}).encode("utf-8")
+            return self._send(handler, 200, body, {"ETag": etag})
+        if path.endswith(f"/runs/{self.run['id']}/artifacts"):
+            repo = "/".join(parts[1:3])
+            listing = {
+                "artifacts": [
+                    {
+                        "id": 1,
+                        "name": self.artifact,
+                        "expired": False,
+                        "archive_download_url": f"{self.base_url}/repos/{repo}/actions/artifacts/1/zip",
+                    }
+                ]
+            }
+            return self._send(handler, 200, json.dumps(listing).encode("utf-8"))
+        if path.endswith("/actions/artifacts/1/zip"):
+            location = f"http://localhost:{self._server.server_port}/storage/1.zip?sig=stub"
+            return self._send(handler, 302, headers={"Location": location})
+        return self._send(handler, 404, b'{"message": "Not Found"}')
+
+
+def run_actions_check(measure_count: int = 200) -> dict:
+    """Round-trip the run-artifact flow against a StubGitHub, offline.
+
+    Checks the latest-run lookup (and its ETag revalidation), the redirected
+    archive download (token dropped on the storage host, spilled to disk past
+    the memory limit) and parsing the downloaded archive. Every mismatch is
+    listed under "failures" in the returned report; HTTP errors raise
+    RuntimeError.
+    """
+    measures = {f"Measure {i}": f"CALCULATE(SUM(Sales[Amount]) * {i}, ALL(Sales))" for i in range(measure_count)}
+    token = "stub-token"
+    failures: List[str] = []
+    with StubGitHub(token, stub_artifact_zip(measures)) as stub:
+        client = GitHubClient(token, base_url=stub.base_url)
+        try:
+            run = latest_workflow_run("owner/repo", "extract.yml", token, client=client)
+            if run.get("id") != stub.run["id"]:
+                failures.append(f"latest run id {run.get('id')!r}, expected {stub.run['id']}")
+            latest_workflow_run("owner/repo", "extract.yml", token, client=client)
+            if client.stats["not_modified"] != 1:
+                failures.append(f"ETag revalidation: {client.stats['not_modified']} not-modified responses, expected 1")
+
+            spill_limit = max(1, len(stub.archive) // 2)
+            with download_run_artifact(
+                "owner/repo", stub.run["id"], token, client=client, max_memory=spill_limit
+            ) as archive:
+                spilled = archive.spilled
+                parsed = parse_artifact_zip(archive)
+        finally:
+            client.close()
+        storage = [r for r in stub.requests if r["path"].startswith("/storage/")]
+        if not storage:
+            failures.append("archive was not fetched from the storage redirect")
+        elif any(r["authorization"] is not None for r in storage):
+            failures.append("API token was sent to the storage host")
+        if not spilled:
+            failures.append(f"archive of {len(stub.archive)} bytes was not spilled to disk past {spill_limit} bytes")
+        if parsed.dax_count != measure_count:
+            failures.append(f"parsed {parsed.dax_count} .dax files, expected {measure_count}")
+        return {
+            "failures": failures,
+            "run_id": stub.run["id"],
+            "archive_bytes": len(stub.archive),
+            "dax_files": parsed.dax_count,
+            "requests": len(stub.requests),
+            "client": dict(client.stats),
+        }
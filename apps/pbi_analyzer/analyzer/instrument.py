@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Union
+
+
+PROFILE_ENV = "PBI_ANALYZER_PROFILE"  # "1" for timings, "memory" to add tracemalloc peaks
+
+logger = logging.getLogger("analyzer.diagnostics")
+
+_NULL_SPAN = nullcontext()
+
+
+class Profiler:
+    """Collects stage timings, counters and (optionally) tracemalloc peaks.
+
+    Spans with the same name accumulate. Use as a context manager when
+    `trace_memory` is set so tracing is started and stopped around the work.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans: Dict[str, dict] = {}
+        self.counters: Counter = Counter()
+        self._order: List[str] = []
+        self._peak_stack: List[int] = []
+        self._started_tracing = False
+
+    def __enter__(self) -> "Profiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _record(self, name: str, seconds: float, calls: int = 1) -> dict:
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = {"seconds": 0.0, "calls": 0}
+            self._order.append(name)
+        span["seconds"] += seconds
+        span["calls"] += calls
+        return span
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # reset_peak is global, so remember the enclosing span's peak so far.
+            outer_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            self._peak_stack.append(0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            span = self._record(name, time.perf_counter() - started)
+            if tracing:
+                peak = max(tracemalloc.get_traced_memory()[1], self._peak_stack.pop())
+                span["peak_bytes"] = max(span.get("peak_bytes", 0), peak)
+                if self._peak_stack:
+                    self._peak_stack[-1] = max(self._peak_stack[-1], outer_peak, peak)
+
+    def add_time(self, name: str, seconds: float, calls: int) -> None:
+        """Record time measured inline (for hot loops where a span per item is too costly)."""
+        if calls:
+            self._record(name, seconds, calls)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def to_dict(self) -> dict:
+        return {
+            "spans": {name: dict(self.spans[name]) for name in self._order},
+            "counters": dict(self.counters),
+            "trace_memory": self.trace_memory,
+        }
+
+    def emit(self, **context) -> None:
+        log_diagnostics(self.to_dict(), **context)
+
+
+def diagnostics_line(diagnostics: dict, **context) -> str:
+    """One compact JSON object per run, suitable for log shipping."""
+    return json.dumps({"event": "analyzer_diagnostics", **context, **diagnostics}, separators=(",", ":"))
+
+
+def log_diagnostics(diagnostics: dict, **context) -> None:
+    logger.info(diagnostics_line(diagnostics, **context))
+
+
+class NullProfiler:
+    """Disabled profiler: every hook is a no-op and spans share one reusable null context."""
+
+    enabled = False
+    trace_memory = False
+
+    def __enter__(self) -> "NullProfiler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def span(self, name: str):
+        return _NULL_SPAN
+
+    def add_time(self, name: str, seconds: float, calls: int) -> None:
+        return None
+
+    def count(self, name: str, value: int = 1) -> None:
+        return None
+
+    def to_dict(self) -> dict:
+        return {}
+
+    def emit(self, **context) -> None:
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+AnyProfiler = Union[Profiler, NullProfiler]
+
+
+def profiler_for(setting: Optional[str]) -> AnyProfiler:
+    """NULL_PROFILER for an empty/off setting, a tracemalloc profiler for "memory", else a timing profiler."""
+    setting = (setting or "").strip().lower()
+    if setting in ("", "0", "false", "no", "off"):
+        return NULL_PROFILER
+    return Profiler(trace_memory=setting == "memory")
+
+
+def profiler_from_env() -> AnyProfiler:
+    return profiler_for(os.environ.get(PROFILE_ENV))
+
+
+def active(profiler: Optional[AnyProfiler]) -> AnyProfiler:
+    return profiler if profiler is not None else NULL_PROFILER
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from json.decoder import scanstring
+from typing import IO, Iterable, Iterator, Optional
+
+
+READ_CHUNK_BYTES = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+_DECODER = json.JSONDecoder()
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+
+
+def iter_text_chunks(
+    binary: IO[bytes], encoding: Optional[str] = None, chunk_size: int = READ_CHUNK_BYTES
+) -> Iterator[str]:
+    """Decode a binary stream incrementally.
+
+    When no encoding is given, UTF-16-LE is assumed if the second byte is NUL
+    (Power BI writes `Report/Layout` that way), otherwise UTF-8.
+    """
+    first = binary.read(chunk_size)
+    if not first:
+        return
+    if encoding is None:
+        if first.startswith(codecs.BOM_UTF8):
+            encoding = "utf-8-sig"
+        elif first.startswith(codecs.BOM_UTF16_LE):
+            encoding = "utf-16"
+        elif len(first) > 1 and first[1] == 0:
+            encoding = "utf-16-le"
+        else:
+            encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)()
+    chunk = first
+    while chunk:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+        chunk = binary.read(chunk_size)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class JsonStream:
+    """Pull-style reader over a JSON document delivered as text chunks.
+
+    Containers are walked key by key / item by item; only values that are
+    explicitly read (`read_value`) are materialized, so peak memory is bounded
+    by the largest value read or skipped rather than by the whole document.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _grow(self) -> bool:
+        # Read at least as much as is currently buffered so retries stay amortized linear.
+        if self._eof:
+            return False
+        pending = [self._buf[self._pos :]]
+        wanted = max(len(pending[0]), 1)
+        added = 0
+        for chunk in self._chunks:
+            pending.append(chunk)
+            added += len(chunk)
+            if added >= wanted:
+                break
+        else:
+            self._eof = True
+        self._buf = "".join(pending)
+        self._pos = 0
+        return added > 0
+
+    def peek(self) -> str:
+        while True:
+            buf = self._buf
+            pos = self._pos
+            end = len(buf)
+            while pos < end and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < end:
+                return buf[pos]
+            if not self._grow():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def read_value(self):
+        if not self.peek():
+            raise ValueError("Unexpected end of JSON stream")
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._grow():
+                    raise
+                continue
+            # A scalar ending exactly at the buffer edge may continue in the next chunk.
+            if end == len(self._buf) and not self._eof and self._grow():
+                continue
+            self._pos = end
+            return value
+
+    def skip_value(self) -> None:
+        first = self.peek()
+        if first not in ("{", "["):
+            self.read_value()
+            return
+        try:
+            # Fast path: the container is already fully buffered.
+            _, end = _DECODER.raw_decode(self._buf, self._pos)
+            self._pos = end
+            return
+        except json.JSONDecodeError:
+            pass
+        # Scan brackets and strings without materializing the container; text already
+        # scanned is dropped on the next refill, so skipping is memory-bounded too.
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+                if not self._grow():
+                    raise ValueError("Unexpected end of JSON stream")
+                continue
+            char = match.group()
+            if char == '"':
+                try:
+                    _, end = scanstring(self._buf, match.end())
+                except json.JSONDecodeError:
+                    self._pos = match.start()
+                    if not self._grow():
+                        raise
+                    continue
+                self._pos = end
+                continue
+            self._pos = match.end()
+            if char in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield object keys; the caller must consume each value before resuming."""
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError("Expected object key in JSON stream")
+            key = self.read_value()
+            self._expect(":")
+            yield key
+            sep = self.peek()
+            self._pos += 1
+            if sep == ",":
+                continue
+            if sep == "}":
+                return
+            raise ValueError(f"Expected ',' or '}}' in JSON stream, found {sep or 'end of input'!r}")
+
+    def iter_array(self) -> Iterator[int]:
+        """Yield item indexes; the caller must consume each item before resuming."""
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            sep = self.peek()
+            self._pos += 1
+            if sep == ",":
+                continue
+            if sep == "]":
+                return
+            raise ValueError(f"Expected ',' or ']' in JSON stream, found {sep or 'end of input'!r}")
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Any, Dict, List, Sequence
 
+from .columnar import RefTable, VisualQueryStore
 
-@dataclass
+# Slotted instances drop the per-object __dict__; corpus runs hold hundreds of thousands of measures.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+_intern = sys.intern
+
+
+@dataclass(**_SLOTS)
 class MeasureDetail:
     name: str
     source: str  # dax | query_ref
@@ -13,16 +21,19 @@ class MeasureDetail:
     dax_formula: str = ""
     matched_tokens: List[str] = field(default_factory=list)
     complexity_score: int = 0
+    rolled_up_cost: int = 0  # own cost plus every measure/calculated column it depends on
+    fan_out: int = 0  # direct dependencies
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SectionSummary:
     section: str
     unique_refs: int
     complexity_score: int
+    rolled_up_cost: int = 0
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ReportAnalysis:
     report_name: str
     source_mode: str  # semantic_only | dax_enriched | demo_precomputed
@@ -32,14 +43,148 @@ class ReportAnalysis:
     unique_columns: int = 0
     measures: Dict[str, MeasureDetail] = field(default_factory=dict)
     section_summaries: List[SectionSummary] = field(default_factory=list)
-    visual_queries: List[dict] = field(default_factory=list)
-    semantic_references: List[dict] = field(default_factory=list)
+    visual_queries: Sequence[dict] = field(default_factory=VisualQueryStore)
+    semantic_references: Sequence[dict] = field(default_factory=RefTable)
     has_dax_formulas: bool = False
     has_bim: bool = False
+    dax_ambiguities: Dict[str, List[str]] = field(default_factory=dict)
+    visual_costs: List[int] = field(default_factory=list)  # aligned with visual_queries
+    dependency_cycles: List[List[str]] = field(default_factory=list)
+    # Per-section/per-visual content hashes used to reuse unchanged visuals on re-analysis.
+    fingerprints: Dict[str, Any] = field(default_factory=dict)
+    # Stage timings and counters from analyzer.instrument; empty unless profiling was enabled.
+    diagnostics: Dict[str, Any] = field(default_factory=dict)
+    # Derived read-side indexes (measure ranking, analyzer.views.AnalysisView); never serialized.
+    derived: Dict[str, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Plain lists are accepted for convenience but always stored in compact form.
+        self.visual_queries = VisualQueryStore.from_visuals(self.visual_queries)
+        self.semantic_references = RefTable.from_refs(self.semantic_references)
+
+    def invalidate_derived(self) -> None:
+        """Drop cached indexes; call after changing measure scores or usage in place."""
+        self.derived.clear()
+
+    def ranked_measures(self) -> List[MeasureDetail]:
+        """All measures by complexity, usage, then name; sorted once and cached."""
+        cached = self.derived.get("ranked")
+        # Replacing or resizing the measures dict also invalidates the ranking.
+        if cached is None or cached[0] is not self.measures or len(cached[1]) != len(self.measures):
+            ranked = sorted(
+                self.measures.values(),
+                key=lambda m: (-m.complexity_score, -m.usage_count, m.name.lower()),
+            )
+            cached = self.derived["ranked"] = (self.measures, ranked)
+        return cached[1]
 
     def top_measures(self, limit: int = 25) -> List[MeasureDetail]:
-        ranked = sorted(
-            self.measures.values(),
-            key=lambda m: (-m.complexity_score, -m.usage_count, m.name.lower()),
-        )
-        return ranked[:limit]
+        return self.ranked_measures()[:limit]
+
+
+def measure_to_dict(measure: MeasureDetail) -> dict:
+    return {
+        "name": measure.name,
+        "source": measure.source,
+        "usage_count": measure.usage_count,
+        "sections": measure.sections,
+        "dax_formula": measure.dax_formula,
+        "matched_tokens": measure.matched_tokens,
+        "complexity_score": measure.complexity_score,
+        "rolled_up_cost": measure.rolled_up_cost,
+        "fan_out": measure.fan_out,
+    }
+
+
+def measure_from_dict(payload: dict) -> MeasureDetail:
+    return MeasureDetail(
+        name=payload["name"],
+        source=payload["source"],
+        usage_count=payload.get("usage_count", 0),
+        # Section names and tokens repeat across measures; share one string object each.
+        sections=[_intern(s) for s in payload.get("sections", [])],
+        dax_formula=payload.get("dax_formula", ""),
+        matched_tokens=[_intern(t) for t in payload.get("matched_tokens", [])],
+        complexity_score=payload.get("complexity_score", 0),
+        rolled_up_cost=payload.get("rolled_up_cost", 0),
+        fan_out=payload.get("fan_out", 0),
+    )
+
+
+def analysis_to_dict(analysis: ReportAnalysis, rows: bool = True) -> dict:
+    """Plain-dict form; `rows=False` leaves out visual queries and semantic references."""
+    payload = {
+        "report_name": analysis.report_name,
+        "source_mode": analysis.source_mode,
+        "total_queries": analysis.total_queries,
+        "total_refs": analysis.total_refs,
+        "unique_measures": analysis.unique_measures,
+        "unique_columns": analysis.unique_columns,
+        "measures": [measure_to_dict(m) for m in analysis.measures.values()],
+        "section_summaries": [
+            {
+                "section": s.section,
+                "unique_refs": s.unique_refs,
+                "complexity_score": s.complexity_score,
+                "rolled_up_cost": s.rolled_up_cost,
+            }
+            for s in analysis.section_summaries
+        ],
+        "has_dax_formulas": analysis.has_dax_formulas,
+        "has_bim": analysis.has_bim,
+        "dax_ambiguities": analysis.dax_ambiguities,
+        "visual_costs": analysis.visual_costs,
+        "dependency_cycles": analysis.dependency_cycles,
+        "fingerprints": analysis.fingerprints,
+        "diagnostics": analysis.diagnostics,
+    }
+    if rows:
+        payload["visual_queries"] = list(analysis.visual_queries)
+        payload["semantic_references"] = list(analysis.semantic_references)
+    return payload
+
+
+# Keys of the report-level summary (measures, sections, cycles) without per-visual data.
+SUMMARY_KEYS = (
+    "report_name",
+    "source_mode",
+    "total_queries",
+    "total_refs",
+    "unique_measures",
+    "unique_columns",
+    "has_dax_formulas",
+    "has_bim",
+    "section_summaries",
+    "measures",
+    "dependency_cycles",
+)
+
+
+def analysis_summary_dict(analysis: ReportAnalysis) -> dict:
+    payload = analysis_to_dict(analysis, rows=False)
+    return {key: payload[key] for key in SUMMARY_KEYS}
+
+
+def analysis_from_dict(payload: dict) -> ReportAnalysis:
+    measures = [measure_from_dict(m) for m in payload.get("measures", [])]
+    return ReportAnalysis(
+        report_name=payload["report_name"],
+        source_mode=payload["source_mode"],
+        total_queries=payload.get("total_queries", 0),
+        total_refs=payload.get("total_refs", 0),
+        unique_measures=payload.get("unique_measures", 0),
+        unique_columns=payload.get("unique_columns", 0),
+        measures={m.name: m for m in measures},
+        section_summaries=[
+            SectionSummary(**{**s, "section": _intern(s["section"])}) for s in payload.get("section_summaries", [])
+        ],
+        visual_queries=payload.get("visual_queries", []),
+        semantic_references=payload.get("semantic_references", []),
+        has_dax_formulas=payload.get("has_dax_formulas", False),
+        has_bim=payload.get("has_bim", False),
+        dax_ambiguities=payload.get("dax_ambiguities", {}),
+        visual_costs=list(payload.get("visual_costs", [])),
+        dependency_cycles=[list(c) for c in payload.get("dependency_cycles", [])],
+        fingerprints=dict(payload.get("fingerprints", {})),
+        diagnostics=dict(payload.get("diagnostics", {})),
+    )
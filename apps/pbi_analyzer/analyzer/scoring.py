@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+import pathlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+COMPLEXITY_TOKENS = [
+    "calc",
+    "budget",
+    "mtd",
+    "ytd",
+    "qtd",
+    "%",
+    "index",
+    "ly",
+    "last year",
+    "variance",
+    "growth",
+    "ratio",
+    "margin",
+]
+
+AGGREGATE_PREFIXES = ("sum(", "min(", "max(", "average(", "count(", "distinctcount(")
+
+SCORING_CONFIG_ENV = "PBI_ANALYZER_SCORING_CONFIG"
+
+# Names are joined with this separator for batch scoring; it never appears in queryRefs.
+_SEPARATOR = "\x00"
+
+
+@dataclass(frozen=True)
+class TokenRule:
+    token: str
+    weight: int = 1
+    boundary: str = "auto"  # auto | word | none
+
+    def resolved_boundary(self) -> str:
+        if self.boundary != "auto":
+            return self.boundary
+        # Short abbreviations ("ly", "mtd") only count as whole words; "ly" must not hit "Daily".
+        return "word" if self.token.isalnum() and len(self.token) <= 3 else "none"
+
+
+class ComplexityScorer:
+    """Scores names against a token set compiled into a single regex.
+
+    One scan per name (or per batch of names) replaces a substring test per
+    token. Each matched token contributes its weight once; names starting with
+    an aggregate wrapper such as `Sum(` are discounted.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[TokenRule],
+        aggregate_prefixes: Sequence[str] = AGGREGATE_PREFIXES,
+        aggregate_discount: int = 1,
+    ):
+        self.rules = [TokenRule(r.token.lower(), r.weight, r.boundary) for r in rules]
+        self.aggregate_prefixes = tuple(p.lower() for p in aggregate_prefixes)
+        self.aggregate_discount = aggregate_discount
+        self._order = {rule.token: idx for idx, rule in enumerate(self.rules)}
+        self._weights = {rule.token: rule.weight for rule in self.rules}
+        self._pattern = self._compile()
+        # An alternation captures one token per offset. Two tokens can only match at the same offset
+        # when one is a prefix of the other, so each token carries the shorter ones to re-check there.
+        self._prefixes: Dict[str, List[re.Pattern]] = {}
+        for rule in self.rules:
+            self._prefixes[rule.token] = [
+                re.compile(_rule_pattern(other))
+                for other in self.rules
+                if len(other.token) < len(rule.token) and rule.token.startswith(other.token)
+            ]
+
+    def fingerprint(self) -> str:
+        payload = json.dumps(
+            [[(r.token, r.weight, r.resolved_boundary()) for r in self.rules], self.aggregate_prefixes, self.aggregate_discount]
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _compile(self) -> Optional[re.Pattern]:
+        if not self.rules:
+            return None
+        # Longest first so the capture is the longest token at each position; shorter ones are in _prefixes.
+        alternatives = [_rule_pattern(rule) for rule in sorted(self.rules, key=lambda r: -len(r.token))]
+        # Zero-width lookahead so tokens overlapping at different offsets are all found.
+        return re.compile("(?=(" + "|".join(alternatives) + "))")
+
+    def _tokens(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(offset, token) of every token match in `text`, including tokens sharing an offset."""
+        for m in self._pattern.finditer(text):
+            token = m.group(1)
+            yield m.start(), token
+            for prefix in self._prefixes[token]:
+                hit = prefix.match(text, m.start())
+                if hit is not None:
+                    yield m.start(), hit.group(0)
+
+    def _finish(self, lowered: str, found: Iterable[str]) -> Tuple[int, List[str]]:
+        matched = sorted(set(found), key=self._order.__getitem__)
+        score = sum(self._weights[tok] for tok in matched)
+        if lowered.startswith(self.aggregate_prefixes):
+            score = max(0, score - self.aggregate_discount)
+        return score, matched
+
+    def score(self, name: str) -> Tuple[int, List[str]]:
+        lowered = name.lower()
+        if self._pattern is None:
+            return self._finish(lowered, ())
+        return self._finish(lowered, (token for _, token in self._tokens(lowered)))
+
+    def score_many(self, names: Sequence[str]) -> List[Tuple[int, List[str]]]:
+        lowered = [name.lower() for name in names]
+        found: List[List[str]] = [[] for _ in lowered]
+        if self._pattern is not None and lowered:
+            text = _SEPARATOR.join(lowered)
+            starts = []
+            offset = 0
+            for item in lowered:
+                starts.append(offset)
+                offset += len(item) + 1
+            for start, token in self._tokens(text):
+                found[bisect.bisect_right(starts, start) - 1].append(token)
+        return [self._finish(low, toks) for low, toks in zip(lowered, found)]
+
+
+def _rule_pattern(rule: TokenRule) -> str:
+    body = re.escape(rule.token)
+    if rule.resolved_boundary() == "word":
+        body = rf"(?<![0-9a-z]){body}(?![0-9a-z])"
+    return body
+
+
+def _rule_from_config(item: Union[str, dict]) -> TokenRule:
+    if isinstance(item, str):
+        return TokenRule(item)
+    return TokenRule(
+        token=str(item["token"]),
+        weight=int(item.get("weight", 1)),
+        boundary=str(item.get("boundary", "auto")),
+    )
+
+
+def load_scorer(config_path: Union[str, pathlib.Path]) -> ComplexityScorer:
+    """Build a scorer from a JSON config.
+
+    Expected shape: {"tokens": ["calc", {"token": "ly", "weight": 2, "boundary": "word"}],
+    "aggregate_prefixes": ["sum("], "aggregate_discount": 1}. Missing keys fall back to defaults.
+    """
+    payload = json.loads(pathlib.Path(config_path).read_text(encoding="utf-8"))
+    tokens = payload.get("tokens", COMPLEXITY_TOKENS)
+    return ComplexityScorer(
+        [_rule_from_config(item) for item in tokens],
+        aggregate_prefixes=payload.get("aggregate_prefixes", AGGREGATE_PREFIXES),
+        aggregate_discount=int(payload.get("aggregate_discount", 1)),
+    )
+
+
+_DEFAULT_SCORER: Optional[ComplexityScorer] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_scorer() -> ComplexityScorer:
+    """Scorer from $PBI_ANALYZER_SCORING_CONFIG when set, else the built-in token set."""
+    global _DEFAULT_SCORER
+    with _DEFAULT_LOCK:
+        if _DEFAULT_SCORER is None:
+            config = os.environ.get(SCORING_CONFIG_ENV)
+            if config:
+                _DEFAULT_SCORER = load_scorer(config)
+            else:
+                _DEFAULT_SCORER = ComplexityScorer([TokenRule(tok) for tok in COMPLEXITY_TOKENS])
+        return _DEFAULT_SCORER
@@ -1,176 +1,471 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
+import time
 import zipfile
-from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from typing import Dict, List, Tuple
-
-from .models import MeasureDetail, ReportAnalysis, SectionSummary
-
-
-COMPLEXITY_TOKENS = [
-    "calc",
-    "budget",
-    "mtd",
-    "ytd",
-    "qtd",
-    "%",
-    "index",
-    "ly",
-    "last year",
-    "variance",
-    "growth",
-    "ratio",
-    "margin",
-]
-
-
-def _extract_query_refs_from_projections(projections: dict) -> List[str]:
-    refs: List[str] = []
-    for _, values in projections.items():
-        if not isinstance(values, list):
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+# COMPLEXITY_TOKENS is re-exported for existing importers.
+from . import __version__
+from .aggregate import COMPLEXITY_TOKENS, ReportAggregator, query_refs_from_projections
+from .columnar import VisualQueryStore
+from .instrument import NULL_PROFILER, AnyProfiler, active
+from .jsonstream import JsonStream, iter_text_chunks
+from .models import ReportAnalysis
+
+
+_REF_KINDS = ("Measure", "Column")
+_EMPTY: dict = {}
+
+SemanticRefParts = Tuple[str, Optional[str], Optional[str]]  # (type, table, name)
+
+# Parallel parsing only pays for the pool start-up and config pickling above this many configs.
+PARALLEL_MIN_CONFIGS = 2000
+_CHUNKS_PER_WORKER = 4
+
+_JSON_ERROR = 1
+_NO_QUERY = 2
+# (section, x, y, width, height, config) sent to a worker for one container.
+_ParseJob = Tuple[str, object, object, object, object, str]
+# Per container: a skip code, or (encoded visual, projection queryRefs, semantic refs).
+_ParsedVisual = Union[int, Tuple[bytes, List[str], List[SemanticRefParts]]]
+
+
+def iter_semantic_refs(query) -> Iterator[SemanticRefParts]:
+    """Measure and Column references in a visual query, in document order.
+
+    Walks with a stack of child iterators, so deep filter trees cannot hit the
+    recursion limit and scalars are skipped without a call. Yields plain
+    tuples; callers decide whether a dict is ever needed.
+    """
+    stack = [iter((query,))]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        for node in stack[-1]:
+            kind = type(node)
+            if kind is dict:
+                if "Measure" in node or "Column" in node:
+                    for ref_type in _REF_KINDS:
+                        field = node.get(ref_type)
+                        if type(field) is dict:
+                            source = field.get("Expression", _EMPTY)
+                            source = source.get("SourceRef", _EMPTY) if type(source) is dict else _EMPTY
+                            table = source.get("Entity") if type(source) is dict else None
+                            yield ref_type, table, field.get("Property")
+                push(iter(node.values()))
+                break
+            if kind is list:
+                push(iter(node))
+                break
+        else:
+            pop()
+
+
+def _parse_configs(jobs: List[_ParseJob]) -> List[_ParsedVisual]:
+    """Parse one chunk of container configs; runs in a worker process for parallel analysis."""
+    results: List[_ParsedVisual] = []
+    for section_name, x, y, width, height, config in jobs:
+        try:
+            cfg = json.loads(config)
+        except json.JSONDecodeError:
+            results.append(_JSON_ERROR)
             continue
-        for item in values:
-            if isinstance(item, dict) and "queryRef" in item:
-                refs.append(str(item["queryRef"]))
-    return refs
-
-
-def _extract_semantic_refs(node, section: str, out_refs: List[dict]) -> None:
-    if isinstance(node, dict):
-        if "Measure" in node and isinstance(node["Measure"], dict):
-            m = node["Measure"]
-            out_refs.append(
-                {
-                    "type": "Measure",
-                    "table": m.get("Expression", {}).get("SourceRef", {}).get("Entity"),
-                    "name": m.get("Property"),
-                    "section": section,
-                }
-            )
-        if "Column" in node and isinstance(node["Column"], dict):
-            c = node["Column"]
-            out_refs.append(
-                {
-                    "type": "Column",
-                    "table": c.get("Expression", {}).get("SourceRef", {}).get("Entity"),
-                    "name": c.get("Property"),
-                    "section": section,
-                }
-            )
-        for value in node.values():
-            _extract_semantic_refs(value, section, out_refs)
-        return
-
-    if isinstance(node, list):
-        for value in node:
-            _extract_semantic_refs(value, section, out_refs)
-
-
-def _score_ref(name: str) -> Tuple[int, List[str]]:
-    lowered = name.lower()
-    matched = [tok for tok in COMPLEXITY_TOKENS if tok in lowered]
-    score = len(matched)
-    if lowered.startswith(("sum(", "min(", "max(", "average(", "count(", "distinctcount(")):
-        score = max(0, score - 1)
-    return score, matched
-
-
-def analyze_pbix_bytes(pbix_name: str, pbix_content: bytes) -> ReportAnalysis:
-    with zipfile.ZipFile(BytesIO(pbix_content), "r") as zf:
-        if "Report/Layout" not in zf.namelist():
-            raise ValueError("PBIX does not contain Report/Layout. Cannot run semantic analysis.")
-        layout_bytes = zf.read("Report/Layout")
+        single_visual = cfg.get("singleVisual", {})
+        query = single_visual.get("prototypeQuery") or single_visual.get("query")
+        if not query:
+            results.append(_NO_QUERY)
+            continue
+        projections = single_visual.get("projections", {})
+        visual = {
+            "section": section_name,
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "projections": projections,
+            "query": query,
+        }
+        results.append(
+            (VisualQueryStore.encode(visual), query_refs_from_projections(projections), list(iter_semantic_refs(query)))
+        )
+    return results
+
 
-    try:
-        layout = json.loads(layout_bytes.decode("utf-16-le"))
-    except UnicodeDecodeError:
-        layout = json.loads(layout_bytes.decode("utf-8"))
+def _parse_in_pool(jobs: List[_ParseJob], workers: int) -> Iterator[_ParsedVisual]:
+    """Parsed configs in job order; chunks are merged in submission order, so the result is deterministic."""
+    size = max(1, -(-len(jobs) // (workers * _CHUNKS_PER_WORKER)))
+    chunks = [jobs[i : i + size] for i in range(0, len(jobs), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_parse_configs, chunks):
+            yield from results
 
-    visual_queries: List[dict] = []
-    semantic_references: List[dict] = []
-    ref_usage = Counter()
-    ref_sections: Dict[str, set] = defaultdict(set)
-    section_refs: Dict[str, set] = defaultdict(set)
+
+def _section_name(section: dict) -> str:
+    return section.get("displayName") or section.get("name") or "Unknown"
+
+
+def _iter_loaded_containers(
+    layout_bytes: bytes, profiler: AnyProfiler = NULL_PROFILER
+) -> Iterator[Tuple[str, dict]]:
+    with profiler.span("layout_decode"):
+        try:
+            text = layout_bytes.decode("utf-16-le")
+        except UnicodeDecodeError:
+            text = layout_bytes.decode("utf-8")
+    with profiler.span("layout_json"):
+        layout = json.loads(text)
+    del text
 
     for section in layout.get("sections", []):
-        section_name = section.get("displayName") or section.get("name") or "Unknown"
+        section_name = _section_name(section)
         for vc in section.get("visualContainers", []):
-            config = vc.get("config")
-            if not config:
-                continue
-            try:
-                cfg = json.loads(config)
-            except json.JSONDecodeError:
-                continue
-            single_visual = cfg.get("singleVisual", {})
-            query = single_visual.get("prototypeQuery") or single_visual.get("query")
-            if not query:
+            yield section_name, vc
+
+
+def _iter_section_containers(stream: JsonStream) -> Iterator[Tuple[str, dict]]:
+    header: dict = {}
+    pending: List[dict] = []
+    for key in stream.iter_object():
+        if key in ("name", "displayName"):
+            header[key] = stream.read_value()
+        elif key == "visualContainers" and stream.peek() == "[":
+            for _ in stream.iter_array():
+                vc = stream.read_value()
+                if not isinstance(vc, dict):
+                    continue
+                # displayName normally precedes visualContainers; otherwise hold until the section ends.
+                if header.get("displayName"):
+                    yield header["displayName"], vc
+                else:
+                    pending.append(vc)
+        else:
+            stream.skip_value()
+    section_name = _section_name(header)
+    for vc in pending:
+        yield section_name, vc
+
+
+def _iter_streamed_containers(layout_stream) -> Iterator[Tuple[str, dict]]:
+    stream = JsonStream(iter_text_chunks(layout_stream))
+    for key in stream.iter_object():
+        if key != "sections" or stream.peek() != "[":
+            stream.skip_value()
+            continue
+        for _ in stream.iter_array():
+            if stream.peek() != "{":
+                stream.skip_value()
                 continue
+            yield from _iter_section_containers(stream)
+
 
-            projections = single_visual.get("projections", {})
-            query_refs = _extract_query_refs_from_projections(projections)
-            for ref in query_refs:
-                ref_usage[ref] += 1
-                ref_sections[ref].add(section_name)
-                section_refs[section_name].add(ref)
-
-            _extract_semantic_refs(query, section_name, semantic_references)
-            visual_queries.append(
-                {
-                    "section": section_name,
-                    "x": vc.get("x"),
-                    "y": vc.get("y"),
-                    "width": vc.get("width"),
-                    "height": vc.get("height"),
-                    "projections": projections,
-                    "query": query,
-                }
-            )
-
-    measures: Dict[str, MeasureDetail] = {}
-    for ref, count in ref_usage.items():
-        score, matched = _score_ref(ref)
-        measures[ref] = MeasureDetail(
-            name=ref,
-            source="query_ref",
-            usage_count=count,
-            sections=sorted(ref_sections[ref]),
-            matched_tokens=matched,
-            complexity_score=score,
+def analyze_pbix_bytes(
+    pbix_name: str,
+    pbix_content: bytes,
+    streaming: bool = True,
+    previous: Optional[ReportAnalysis] = None,
+    profiler: Optional[AnyProfiler] = None,
+    compact_refs: bool = False,
+    parse_workers: int = 0,
+) -> ReportAnalysis:
+    """Analyze a PBIX; with `previous` (an earlier analysis of the same report),
+    containers whose fingerprint is unchanged are reused instead of re-parsed.
+
+    `compact_refs` stores one semantic reference per distinct field and section
+    with a "count" of its occurrences; visual reuse is skipped in that mode.
+
+    `parse_workers` > 1 parses visual configs in a process pool when at least
+    PARALLEL_MIN_CONFIGS of them need parsing; the result equals a serial run.
+    """
+    return analyze_pbix_file(
+        pbix_name, BytesIO(pbix_content), streaming, previous, profiler, compact_refs, parse_workers
+    )
+
+
+def analyze_pbix_path(pbix_path: Union[str, os.PathLike], pbix_name: Optional[str] = None, **options) -> ReportAnalysis:
+    """`analyze_pbix_bytes` for a PBIX on disk, without reading the file into memory.
+
+    Only the zip directory and the compressed `Report/Layout` member are read,
+    so memory tracks the Layout rather than the (DataModel-dominated) file.
+    """
+    with open(pbix_path, "rb") as handle:
+        return analyze_pbix_file(pbix_name or os.path.basename(pbix_path), handle, **options)
+
+
+def analyze_pbix_file(
+    pbix_name: str,
+    pbix_file: BinaryIO,
+    streaming: bool = True,
+    previous: Optional[ReportAnalysis] = None,
+    profiler: Optional[AnyProfiler] = None,
+    compact_refs: bool = False,
+    parse_workers: int = 0,
+) -> ReportAnalysis:
+    """`analyze_pbix_bytes` for a seekable binary file (an open PBIX, an upload, a spooled temp file)."""
+    profiler = active(profiler)
+    if compact_refs:
+        previous = None
+    with profiler.span("zip_open"):
+        zf = zipfile.ZipFile(pbix_file, "r")
+        has_layout = "Report/Layout" in zf.namelist()
+    with zf:
+        if not has_layout:
+            raise ValueError("PBIX does not contain Report/Layout. Cannot run semantic analysis.")
+        if streaming:
+            with zf.open("Report/Layout") as layout_stream:
+                containers = _iter_streamed_containers(layout_stream)
+                if profiler.enabled:
+                    containers = _timed_iter(containers, profiler, "layout_stream")
+                return _analyze_containers(pbix_name, containers, previous, profiler, compact_refs, parse_workers)
+        with profiler.span("layout_read"):
+            layout_bytes = zf.read("Report/Layout")
+    containers = _iter_loaded_containers(layout_bytes, profiler)
+    return _analyze_containers(pbix_name, containers, previous, profiler, compact_refs, parse_workers)
+
+
+def _timed_iter(items: Iterator[Tuple[str, dict]], profiler: AnyProfiler, name: str) -> Iterator[Tuple[str, dict]]:
+    # Time spent producing items; with a streamed layout that is the UTF-16 decode plus incremental JSON parse.
+    iterator = iter(items)
+    total = 0.0
+    calls = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            total += time.perf_counter() - started
+        calls += 1
+        yield item
+    profiler.add_time(name, total, calls)
+
+
+def _container_fingerprint(section_name: str, vc: dict) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(section_name.encode("utf-8", "surrogatepass"))
+    digest.update(repr((vc.get("x"), vc.get("y"), vc.get("width"), vc.get("height"))).encode("utf-8"))
+    config = vc.get("config")
+    digest.update(config.encode("utf-8", "surrogatepass") if isinstance(config, str) else repr(config).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _reusable_containers(previous: Optional[ReportAnalysis]) -> Tuple[Dict[str, Tuple[int, int, int]], Set[str]]:
+    """fingerprint -> (visual index, first ref, ref count), plus fingerprints that produced no visual."""
+    fingerprints = previous.fingerprints if previous is not None else {}
+    # Compact analyses merge refs across visuals, so per-visual ref ranges do not exist.
+    if fingerprints.get("version") != __version__ or fingerprints.get("compact"):
+        return {}, set()
+    visuals = fingerprints.get("visuals", [])
+    counts = fingerprints.get("ref_counts", [])
+    # Stale or foreign fingerprints must never be trusted over a re-parse.
+    if len(visuals) != len(previous.visual_queries) or len(counts) != len(visuals):
+        return {}, set()
+    if sum(counts) != len(previous.semantic_references):
+        return {}, set()
+    reusable = {}
+    offset = 0
+    for index, (fingerprint, count) in enumerate(zip(visuals, counts)):
+        reusable.setdefault(fingerprint, (index, offset, count))
+        offset += count
+    return reusable, set(fingerprints.get("skipped", []))
+
+
+class _ContainerScan:
+    """Fingerprint and reuse bookkeeping shared by the serial and parallel container loops."""
+
+    def __init__(self, previous: Optional[ReportAnalysis]) -> None:
+        self.previous = previous
+        self.reusable, self.skipped_before = _reusable_containers(previous)
+        self.section_digests: Dict[str, hashlib.blake2b] = {}
+        self.visual_fingerprints: List[str] = []
+        self.ref_counts: List[int] = []
+        self.skipped: List[str] = []
+        self.reused = self.parsed = self.json_errors = self.no_query = 0
+
+    def fingerprint(self, section_name: str, vc: dict) -> str:
+        fingerprint = _container_fingerprint(section_name, vc)
+        section_digest = self.section_digests.get(section_name)
+        if section_digest is None:
+            section_digest = self.section_digests[section_name] = hashlib.blake2b(digest_size=16)
+        section_digest.update(fingerprint.encode("ascii"))
+        return fingerprint
+
+    def reuse(self, aggregator: ReportAggregator, fingerprint: str, hit: Tuple[int, int, int]) -> None:
+        index, offset, count = hit
+        previous = self.previous
+        aggregator.add_stored_visual(
+            previous.visual_queries, index, previous.semantic_references, offset, offset + count
         )
+        self.visual_fingerprints.append(fingerprint)
+        self.ref_counts.append(count)
+        self.reused += 1
+
+    def finish(
+        self, aggregator: ReportAggregator, pbix_name: str, profiler: AnyProfiler, compact_refs: bool
+    ) -> ReportAnalysis:
+        profiler.count("containers_seen", len(self.visual_fingerprints) + len(self.skipped))
+        profiler.count("visuals_parsed", self.parsed)
+        profiler.count("visuals_reused", self.reused)
+        profiler.count("configs_skipped_json_error", self.json_errors)
+        profiler.count("configs_without_query", self.no_query)
+        profiler.count("refs_emitted", len(aggregator.semantic_references))
+        with profiler.span("aggregate_build"):
+            analysis = aggregator.build(pbix_name, "semantic_only")
+        analysis.diagnostics = profiler.to_dict()
+        analysis.fingerprints = {
+            "version": __version__,
+            "sections": {name: digest.hexdigest() for name, digest in self.section_digests.items()},
+            "visuals": self.visual_fingerprints,
+            "ref_counts": self.ref_counts,
+            "skipped": self.skipped,
+            "reused_visuals": self.reused,
+            "compact": compact_refs,
+        }
+        return analysis
+
+
+def _analyze_containers(
+    pbix_name: str,
+    containers: Iterator[Tuple[str, dict]],
+    previous: Optional[ReportAnalysis] = None,
+    profiler: AnyProfiler = NULL_PROFILER,
+    compact_refs: bool = False,
+    parse_workers: int = 0,
+) -> ReportAnalysis:
+    if parse_workers > 1:
+        return _analyze_containers_parallel(pbix_name, containers, previous, profiler, compact_refs, parse_workers)
+    aggregator = ReportAggregator(compact_refs=compact_refs)
+    add_ref = aggregator.add_semantic_fields
+    timed = profiler.enabled
+    clock = time.perf_counter
+    parse_seconds = refs_seconds = 0.0
+    scan = _ContainerScan(previous)
+    reusable, skipped_before, skipped = scan.reusable, scan.skipped_before, scan.skipped
+
+    for section_name, vc in containers:
+        fingerprint = scan.fingerprint(section_name, vc)
+        if fingerprint in skipped_before:
+            skipped.append(fingerprint)
+            continue
+
+        hit = reusable.get(fingerprint)
+        if hit is not None:
+            scan.reuse(aggregator, fingerprint, hit)
+            continue
 
-    section_summaries: List[SectionSummary] = []
-    for sec, refs in section_refs.items():
-        sec_score = sum(_score_ref(r)[0] for r in refs)
-        section_summaries.append(
-            SectionSummary(section=sec, unique_refs=len(refs), complexity_score=sec_score)
+        config = vc.get("config")
+        if not config:
+            skipped.append(fingerprint)
+            continue
+        if timed:
+            started = clock()
+        try:
+            cfg = json.loads(config)
+        except json.JSONDecodeError:
+            scan.json_errors += 1
+            skipped.append(fingerprint)
+            continue
+        finally:
+            if timed:
+                parse_seconds += clock() - started
+        scan.parsed += 1
+        single_visual = cfg.get("singleVisual", {})
+        query = single_visual.get("prototypeQuery") or single_visual.get("query")
+        if not query:
+            scan.no_query += 1
+            skipped.append(fingerprint)
+            continue
+
+        refs_before = len(aggregator.semantic_references)
+        aggregator.add_visual(
+            {
+                "section": section_name,
+                "x": vc.get("x"),
+                "y": vc.get("y"),
+                "width": vc.get("width"),
+                "height": vc.get("height"),
+                "projections": single_visual.get("projections", {}),
+                "query": query,
+            }
         )
-    section_summaries.sort(key=lambda s: (-s.complexity_score, -s.unique_refs, s.section.lower()))
-
-    unique_measure_keys = {
-        (r.get("table") or "Unknown", r.get("name") or "Unknown")
-        for r in semantic_references
-        if r.get("type") == "Measure"
-    }
-    unique_column_keys = {
-        (r.get("table") or "Unknown", r.get("name") or "Unknown")
-        for r in semantic_references
-        if r.get("type") == "Column"
-    }
-
-    return ReportAnalysis(
-        report_name=pbix_name,
-        source_mode="semantic_only",
-        total_queries=len(visual_queries),
-        total_refs=len(semantic_references),
-        unique_measures=len(unique_measure_keys),
-        unique_columns=len(unique_column_keys),
-        measures=measures,
-        section_summaries=section_summaries,
-        visual_queries=visual_queries,
-        semantic_references=semantic_references,
-        has_dax_formulas=False,
-        has_bim=False,
-    )
+        if timed:
+            started = clock()
+        for ref_type, table, name in iter_semantic_refs(query):
+            add_ref(ref_type, table, name, section_name)
+        if timed:
+            refs_seconds += clock() - started
+        scan.visual_fingerprints.append(fingerprint)
+        scan.ref_counts.append(len(aggregator.semantic_references) - refs_before)
+
+    profiler.add_time("config_parse", parse_seconds, scan.parsed + scan.json_errors)
+    profiler.add_time("extract_semantic_refs", refs_seconds, len(scan.visual_fingerprints) - scan.reused)
+    return scan.finish(aggregator, pbix_name, profiler, compact_refs)
+
+
+def _analyze_containers_parallel(
+    pbix_name: str,
+    containers: Iterator[Tuple[str, dict]],
+    previous: Optional[ReportAnalysis],
+    profiler: AnyProfiler,
+    compact_refs: bool,
+    parse_workers: int,
+) -> ReportAnalysis:
+    """Collect the configs that need parsing, parse them in a pool, then replay every
+    container in document order so the aggregate matches `_analyze_containers`.
+
+    Unlike the serial loop this holds every pending config string until parsing starts.
+    """
+    scan = _ContainerScan(previous)
+    # Per container: (fingerprint, section, reuse hit); section None marks a container skipped up front.
+    plan: List[Tuple[str, Optional[str], Optional[Tuple[int, int, int]]]] = []
+    jobs: List[_ParseJob] = []
+    for section_name, vc in containers:
+        fingerprint = scan.fingerprint(section_name, vc)
+        if fingerprint in scan.skipped_before:
+            plan.append((fingerprint, None, None))
+            continue
+        hit = scan.reusable.get(fingerprint)
+        if hit is None:
+            config = vc.get("config")
+            if not config:
+                plan.append((fingerprint, None, None))
+                continue
+            jobs.append((section_name, vc.get("x"), vc.get("y"), vc.get("width"), vc.get("height"), config))
+        plan.append((fingerprint, section_name, hit))
+
+    aggregator = ReportAggregator(compact_refs=compact_refs)
+    add_ref = aggregator.add_semantic_fields
+    pooled = len(jobs) >= PARALLEL_MIN_CONFIGS
+    profiler.count("configs_parsed_in_pool", len(jobs) if pooled else 0)
+    with profiler.span("parallel_parse" if pooled else "config_parse"):
+        parsed = _parse_in_pool(jobs, parse_workers) if pooled else iter(_parse_configs(jobs))
+        for fingerprint, section_name, hit in plan:
+            if section_name is None:
+                scan.skipped.append(fingerprint)
+                continue
+            if hit is not None:
+                scan.reuse(aggregator, fingerprint, hit)
+                continue
+            result = next(parsed)
+            if result == _JSON_ERROR:
+                scan.json_errors += 1
+                scan.skipped.append(fingerprint)
+                continue
+            scan.parsed += 1
+            if result == _NO_QUERY:
+                scan.no_query += 1
+                scan.skipped.append(fingerprint)
+                continue
+            payload, query_refs, refs = result
+            refs_before = len(aggregator.semantic_references)
+            aggregator.add_encoded_visual(section_name, payload, query_refs)
+            for ref_type, table, name in refs:
+                add_ref(ref_type, table, name, section_name)
+            scan.visual_fingerprints.append(fingerprint)
+            scan.ref_counts.append(len(aggregator.semantic_references) - refs_before)
+    return scan.finish(aggregator, pbix_name, profiler, compact_refs)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .models import MeasureDetail, ReportAnalysis
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    total: int
+    page: int  # zero-based, clamped to the available pages
+    page_size: int
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+    @property
+    def start(self) -> int:
+        return self.page * self.page_size
+
+
+def _bounds(total: int, page: int, page_size: int) -> Tuple[int, int, int]:
+    page_size = max(1, page_size)
+    last = max(0, (total - 1) // page_size)
+    page = min(max(0, page), last)
+    return page, page * page_size, min(total, (page + 1) * page_size)
+
+
+class AnalysisView:
+    """Read-side indexes over one analysis for paginated, searchable tables.
+
+    Built once per analysis (see `analysis_view`): the ranked measure order, a
+    word-prefix index over measure names and the section list. After that a
+    page or a search costs time proportional to the page and the matches, not
+    to the size of the report.
+    """
+
+    def __init__(self, analysis: ReportAnalysis):
+        self.analysis = analysis
+        self.ranked: List[MeasureDetail] = analysis.ranked_measures()
+        self.sections: List[str] = analysis.visual_queries.section_names()
+        words: Dict[str, List[int]] = {}
+        for rank, measure in enumerate(self.ranked):
+            for word in set(_WORD.findall(measure.name.lower())):
+                words.setdefault(word, []).append(rank)
+        self._vocabulary = sorted(words)
+        self._postings = [words[word] for word in self._vocabulary]
+        self.artifact_only: List[int] = [
+            rank for rank, m in enumerate(self.ranked) if m.source == "dax" and m.usage_count == 0
+        ]
+        self._last_search: Tuple[str, Sequence[int]] = ("", range(len(self.ranked)))
+        self._ref_counts: Optional[Dict[str, Dict[str, int]]] = None
+
+    def _prefix_ranks(self, prefix: str) -> Set[int]:
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", lo)
+        ranks: Set[int] = set()
+        for postings in self._postings[lo:hi]:
+            ranks.update(postings)
+        return ranks
+
+    def search_measures(self, query: str) -> Sequence[int]:
+        """Ranks of measures with a name word starting with each query word, in rank order."""
+        if query == self._last_search[0]:
+            return self._last_search[1]
+        terms = _WORD.findall(query.lower())
+        if not terms:
+            return range(len(self.ranked))
+        matches: Optional[Set[int]] = None
+        # Longest terms first: they match the fewest words, so the intersection shrinks fastest.
+        for term in sorted(set(terms), key=len, reverse=True):
+            ranks = self._prefix_ranks(term)
+            matches = ranks if matches is None else matches & ranks
+            if not matches:
+                break
+        result = sorted(matches or ())
+        self._last_search = (query, result)
+        return result
+
+    def measure_page(self, query: str = "", page: int = 0, page_size: int = 50) -> Page:
+        ranks = self.search_measures(query)
+        page, start, stop = _bounds(len(ranks), page, page_size)
+        return Page([self.ranked[r] for r in ranks[start:stop]], len(ranks), page, page_size)
+
+    def artifact_only_page(self, page: int = 0, page_size: int = 50) -> Page:
+        """DAX measures from artifacts that no visual references."""
+        page, start, stop = _bounds(len(self.artifact_only), page, page_size)
+        items = [self.ranked[r] for r in self.artifact_only[start:stop]]
+        return Page(items, len(self.artifact_only), page, page_size)
+
+    def visual_page(self, section: str, page: int = 0, page_size: int = 10) -> Page:
+        """(visual index, visual query) pairs of one section; only this page is decoded."""
+        indices = self.analysis.visual_queries.section_indices(section)
+        page, start, stop = _bounds(len(indices), page, page_size)
+        store = self.analysis.visual_queries
+        return Page([(i, store[i]) for i in indices[start:stop]], len(indices), page, page_size)
+
+    def section_ref_counts(self) -> Dict[str, Dict[str, int]]:
+        """Semantic reference rows per section and type, counted once."""
+        if self._ref_counts is None:
+            counts: Dict[str, Dict[str, int]] = {}
+            for (section, ref_type), n in self.analysis.semantic_references.section_type_counts().items():
+                counts.setdefault(section or "Unknown", {})[ref_type or "Unknown"] = n
+            self._ref_counts = counts
+        return self._ref_counts
+
+
+def analysis_view(analysis: ReportAnalysis) -> AnalysisView:
+    """The cached view of an analysis, rebuilt when its measure ranking was invalidated."""
+    view = analysis.derived.get("view")
+    if view is None or view.ranked is not analysis.ranked_measures():
+        view = analysis.derived["view"] = AnalysisView(analysis)
+    return view
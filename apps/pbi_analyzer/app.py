@@ -1,24 +1,74 @@
 from __future__ import annotations
 
+import dataclasses
+import heapq
 import json
 import pathlib
 import time
-from typing import Dict, Optional
+from typing import Callable, List, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
-from analyzer.artifacts import ArtifactParseResult, parse_artifact_folder, parse_artifact_zip
-from analyzer.demo_loader import load_demo_reports
+from analyzer.artifacts import (
+    ArtifactParseResult,
+    artifact_folder_signature,
+    parse_artifact_folder,
+    parse_artifact_zip,
+    parse_bim_file,
+)
+from analyzer.cache import AnalysisCache, analyze_pbix_cached, content_key
+from analyzer.corpus_index import CorpusIndex, default_index_path
+from analyzer.demo_loader import DemoCatalog, load_demo_catalog
 from analyzer.engine import build_markdown_summary, merge_dax_into_analysis, repo_root_from_app
-from analyzer.github_actions import artifacts_for_run, latest_workflow_run, trigger_extract_workflow
-from analyzer.models import ReportAnalysis
-from analyzer.semantic import analyze_pbix_bytes
+from analyzer.github_actions import (
+    RunPoller,
+    RunStatus,
+    artifacts_for_run,
+    client_for,
+    download_run_artifact,
+    latest_workflow_run,
+    trigger_extract_workflow,
+)
+from analyzer.instrument import NULL_PROFILER, AnyProfiler, Profiler
+from analyzer.models import MeasureDetail, ReportAnalysis, analysis_summary_dict
+from analyzer.views import analysis_view
 
 
 st.set_page_config(page_title="PowerBI Analyzer Demo", layout="wide")
 
 
+@st.cache_resource
+def _analysis_cache() -> AnalysisCache:
+    return AnalysisCache()
+
+
+@st.cache_resource
+def _corpus_index(path: str) -> CorpusIndex:
+    return CorpusIndex(path)
+
+
+def _parse_artifact_zip_cached(
+    cache: AnalysisCache, artifact_bytes: bytes, profiler: AnyProfiler = NULL_PROFILER
+) -> ArtifactParseResult:
+    key = content_key(artifact_bytes)
+    parsed = cache.get_artifacts(key)
+    if parsed is None:
+        parsed = parse_artifact_zip(artifact_bytes, profiler=profiler)
+        cache.put_artifacts(key, parsed)
+    else:
+        profiler.count("artifact_cache_hits")
+    return parsed
+
+
+def _detached_copy(analysis: ReportAnalysis) -> ReportAnalysis:
+    return dataclasses.replace(
+        analysis,
+        measures={k: dataclasses.replace(m) for k, m in analysis.measures.items()},
+        section_summaries=[dataclasses.replace(summary) for summary in analysis.section_summaries],
+    )
+
+
 def _render_source_badges(analysis: ReportAnalysis) -> None:
     cols = st.columns(4)
     cols[0].metric("Source mode", analysis.source_mode)
@@ -28,47 +78,19 @@ def _render_source_badges(analysis: ReportAnalysis) -> None:
 
 
 def _analysis_to_json(analysis: ReportAnalysis) -> str:
-    payload = {
-        "report_name": analysis.report_name,
-        "source_mode": analysis.source_mode,
-        "total_queries": analysis.total_queries,
-        "total_refs": analysis.total_refs,
-        "unique_measures": analysis.unique_measures,
-        "unique_columns": analysis.unique_columns,
-        "has_dax_formulas": analysis.has_dax_formulas,
-        "has_bim": analysis.has_bim,
-        "section_summaries": [
-            {
-                "section": s.section,
-                "unique_refs": s.unique_refs,
-                "complexity_score": s.complexity_score,
-            }
-            for s in analysis.section_summaries
-        ],
-        "measures": [
-            {
-                "name": m.name,
-                "source": m.source,
-                "usage_count": m.usage_count,
-                "sections": m.sections,
-                "complexity_score": m.complexity_score,
-                "matched_tokens": m.matched_tokens,
-                "dax_formula": m.dax_formula,
-            }
-            for m in analysis.measures.values()
-        ],
-    }
-    return json.dumps(payload, indent=2)
+    return json.dumps(analysis_summary_dict(analysis), separators=(",", ":"))
 
 
-def _build_measure_table(analysis: ReportAnalysis) -> pd.DataFrame:
+def _build_measure_table(measures: List[MeasureDetail]) -> pd.DataFrame:
     rows = []
-    for m in analysis.top_measures(200):
+    for m in measures:
         rows.append(
             {
                 "Measure": m.name,
                 "Source": m.source,
                 "Complexity": m.complexity_score,
+                "Rolled-up Cost": m.rolled_up_cost,
+                "Fan-out": m.fan_out,
                 "Usage Count": m.usage_count,
                 "Sections": ", ".join(m.sections),
                 "Has Formula": bool(m.dax_formula),
@@ -77,6 +99,73 @@ def _build_measure_table(analysis: ReportAnalysis) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
+def _page_number(label: str, page_count: int, key: str) -> int:
+    """Zero-based page picked by the user; no control when everything fits on one page."""
+    if page_count <= 1:
+        return 0
+    return int(st.number_input(f"{label} (of {page_count})", min_value=1, max_value=page_count, value=1, key=key)) - 1
+
+
+def _render_corpus_search(analysis: ReportAnalysis) -> None:
+    st.subheader("Cross-Report Field Usage")
+    index_path = st.text_input("Index file", value=str(default_index_path()))
+    index = _corpus_index(index_path)
+    stats = index.stats()
+    st.caption(
+        f"{stats['reports']} report(s), {stats['objects']} field(s), {stats['postings']} posting(s). "
+        "Build it headlessly with `python -m analyzer index <report-query-logic folder>`."
+    )
+    if st.button("Add this report to the index"):
+        updated = index.index_report(analysis)
+        st.success("Indexed." if updated else "Already up to date.")
+
+    query = st.text_input("Field or queryRef", placeholder="SorDetail.Calc Index to Budget Bookings")
+    if not query:
+        return
+    postings = index.lookup_ref(query)
+    if postings:
+        st.write(f"Used by **{len({p.report for p in postings})}** report(s) in **{len(postings)}** visual(s).")
+        st.dataframe(pd.DataFrame([dataclasses.asdict(p) for p in postings]), use_container_width=True)
+        return
+    matches = index.search(query)
+    if not matches:
+        st.info("No indexed field matches.")
+        return
+    st.dataframe(
+        pd.DataFrame(matches, columns=["Type", "Table", "Name", "Reports", "Visuals"]),
+        use_container_width=True,
+    )
+
+
+def _render_diagnostics(analysis: ReportAnalysis) -> None:
+    st.subheader("Stage Diagnostics")
+    diagnostics = analysis.diagnostics
+    if not diagnostics:
+        st.info("Enable **Collect diagnostics** in the sidebar to time each analysis stage.")
+        return
+    spans = diagnostics.get("spans", {})
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "Stage": name,
+                    "Seconds": round(span["seconds"], 4),
+                    "Calls": span["calls"],
+                    "Peak MB": round(span["peak_bytes"] / 1_000_000, 2) if "peak_bytes" in span else None,
+                }
+                for name, span in spans.items()
+            ]
+        ),
+        use_container_width=True,
+    )
+    counters = diagnostics.get("counters", {})
+    if counters:
+        st.dataframe(
+            pd.DataFrame(sorted(counters.items()), columns=["Counter", "Value"]), use_container_width=True
+        )
+    st.caption("Nested stages overlap, so seconds do not sum to the total.")
+
+
 def _render_upload_help() -> None:
     st.info(
         "For full DAX formulas, provide extraction artifacts containing `.dax` files "
@@ -178,6 +267,7 @@ def _render_actions_handoff_panel() -> None:
                             )
                             run_id = run.get("id")
                             if run_id:
+                                st.session_state["actions_last_run_id"] = int(run_id)
                                 artifacts = artifacts_for_run(
                                     repo=repo.strip(),
                                     run_id=int(run_id),
@@ -187,29 +277,95 @@ def _render_actions_handoff_panel() -> None:
                                 st.write({"artifacts": names})
                                 if run.get("conclusion") == "success":
                                     st.success(
-                                        "Workflow succeeded. Download artifact `pbix-extract-artifacts` "
-                                        "from the run page, then load it in this app."
+                                        "Workflow succeeded. Use **Load run artifacts** below to merge "
+                                        "`pbix-extract-artifacts` into the current analysis."
                                     )
                     except Exception as exc:
                         st.error(f"Failed to fetch workflow run: {exc}")
 
         auto_poll = st.checkbox("Auto-poll latest run every 15s", value=False)
         if auto_poll and gh_token.strip():
-            try:
-                run = latest_workflow_run(
-                    repo=repo.strip(),
-                    workflow_file=workflow_file.strip(),
-                    token=gh_token.strip(),
-                )
-                if run:
-                    st.caption(
-                        f"Latest run: status={run.get('status')} conclusion={run.get('conclusion')} "
-                        f"url={run.get('html_url')}"
-                    )
-                time.sleep(15)
-                st.rerun()
-            except Exception as exc:
-                st.error(f"Auto-poll failed: {exc}")
+            poller = _run_poller(repo.strip(), workflow_file.strip(), gh_token.strip())
+            _render_poll_status(poller)
+        else:
+            _stop_run_poller()
+
+        _render_run_artifact_ingest(repo.strip(), gh_token.strip())
+
+
+def _render_run_artifact_ingest(repo: str, token: str) -> None:
+    run_id = st.number_input(
+        "Run id", min_value=0, step=1, value=int(st.session_state.get("actions_last_run_id", 0))
+    )
+    # The report shown on the previous rerun, which is the one on screen when the button is clicked.
+    report_key = st.session_state.get("active_report_key")
+    if st.button("Load run artifacts", disabled=not (token and run_id and report_key)):
+        try:
+            # Streamed to a spooled temp file, so large archives never sit in memory whole.
+            with download_run_artifact(repo, int(run_id), token) as archive:
+                parsed = parse_artifact_zip(archive)
+            st.session_state["run_artifacts"] = (int(run_id), parsed, report_key)
+        except Exception as exc:
+            st.error(f"Failed to load run artifacts: {exc}")
+    if not report_key:
+        st.caption("Open a report first; run artifacts are merged into the report they were loaded for.")
+    loaded = st.session_state.get("run_artifacts")
+    if loaded is not None:
+        st.caption(
+            f"Run {loaded[0]} artifacts loaded ({loaded[1].dax_count} .dax files) for {loaded[2][1]}; "
+            "merged into that report when no artifact ZIP or folder is given."
+        )
+        if st.button("Forget run artifacts"):
+            del st.session_state["run_artifacts"]
+            st.rerun()
+
+
+def _run_poller(repo: str, workflow_file: str, token: str) -> RunPoller:
+    """One background poller per session; replaced when the repo, workflow or token changes."""
+    target = (repo, workflow_file, token)
+    poller: Optional[RunPoller] = st.session_state.get("actions_poller")
+    if poller is None or (poller.repo, poller.workflow_file, poller.client.token) != target:
+        _stop_run_poller()
+        poller = RunPoller(client_for(token), repo, workflow_file, interval=15.0).start()
+        st.session_state["actions_poller"] = poller
+    # A poller that went idle (no rerun read its status for a while) resumes when read again.
+    return poller.start()
+
+
+def _stop_run_poller() -> None:
+    poller: Optional[RunPoller] = st.session_state.pop("actions_poller", None)
+    if poller is not None:
+        poller.stop(timeout=0)
+
+
+def _render_run_status(status: Optional[RunStatus]) -> None:
+    if status is None:
+        st.caption("Polling latest run...")
+        return
+    if status.error:
+        st.error(f"Auto-poll failed: {status.error}")
+    run = status.run
+    if run:
+        checked = time.strftime("%H:%M:%S", time.localtime(status.checked_at))
+        st.caption(
+            f"Latest run: status={run.get('status')} conclusion={run.get('conclusion')} "
+            f"url={run.get('html_url')} (checked {checked})"
+        )
+        if status.artifacts:
+            st.caption(f"Artifacts: {', '.join(status.artifacts)}")
+        if run.get("id"):
+            st.session_state["actions_last_run_id"] = int(run["id"])
+
+
+def _render_poll_status(poller: RunPoller) -> None:
+    _render_run_status(poller.status())
+
+
+# On Streamlit versions with fragments, only the status block reruns on a timer; the
+# poller thread does the network work. Older versions show the status on normal reruns.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if _fragment is not None:
+    _render_poll_status = _fragment(run_every=5)(_render_poll_status)
 
 
 def _render_artifact_validation(result: ArtifactParseResult) -> None:
@@ -226,21 +382,81 @@ def _render_artifact_validation(result: ArtifactParseResult) -> None:
         st.warning("No `.bim` detected in artifact content or expected sibling path.")
 
 
-def _maybe_enrich_with_artifacts(base: ReportAnalysis, zip_file, folder_text: str) -> ReportAnalysis:
-    enriched = base
+def _run_artifacts_for(report_key: tuple) -> Optional[Tuple[int, ArtifactParseResult, tuple]]:
+    """Run artifacts loaded from GitHub, only if they were loaded for this report."""
+    loaded = st.session_state.get("run_artifacts")
+    return loaded if loaded is not None and loaded[2] == report_key else None
+
+
+def _artifact_signature(zip_file, folder_text: str, report_key: tuple) -> Optional[tuple]:
+    """What `_maybe_enrich_with_artifacts` would merge, cheap enough to compute on every rerun."""
     if zip_file is not None:
-        parsed = parse_artifact_zip(zip_file.getvalue())
-        _render_artifact_validation(parsed)
-        enriched = merge_dax_into_analysis(enriched, parsed.measures, parsed.has_bim)
+        return ("zip", zip_file.name, zip_file.size, getattr(zip_file, "file_id", None))
+    if folder_text.strip():
+        path = pathlib.Path(folder_text.strip())
+        if path.is_file() and path.suffix.lower() == ".bim":
+            stat = path.stat()
+            return ("bim", str(path), stat.st_mtime_ns, stat.st_size)
+        if path.is_dir():
+            return ("folder", str(path), artifact_folder_signature(str(path)))
+        return ("missing", str(path))
+    run_artifacts = _run_artifacts_for(report_key)
+    if run_artifacts is not None:
+        return ("run", run_artifacts[0])
+    return None
+
+
+def _maybe_enrich_with_artifacts(
+    base: ReportAnalysis, zip_file, folder_text: str, report_key: tuple, profiler: AnyProfiler = NULL_PROFILER
+) -> Tuple[ReportAnalysis, Optional[ArtifactParseResult]]:
+    parsed = None
+    if zip_file is not None:
+        parsed = _parse_artifact_zip_cached(_analysis_cache(), zip_file.getvalue(), profiler)
     elif folder_text.strip():
         path = pathlib.Path(folder_text.strip())
-        if path.exists() and path.is_dir():
-            parsed = parse_artifact_folder(str(path))
-            _render_artifact_validation(parsed)
-            enriched = merge_dax_into_analysis(enriched, parsed.measures, parsed.has_bim)
-        else:
-            st.warning("Artifact folder path not found. Continuing with semantic-only analysis.")
-    return enriched
+        if path.is_file() and path.suffix.lower() == ".bim":
+            parsed = parse_bim_file(str(path), profiler=profiler)
+        elif path.exists() and path.is_dir():
+            # A changed folder is rescanned; the manifest limits re-reads to changed .dax files.
+            parsed = parse_artifact_folder(str(path), incremental=True, profiler=profiler)
+    else:
+        run_artifacts = _run_artifacts_for(report_key)
+        parsed = run_artifacts[1] if run_artifacts is not None else None
+    if parsed is None:
+        return base, None
+    return merge_dax_into_analysis(base, parsed.measures, parsed.has_bim, profiler=profiler), parsed
+
+
+def _session_analysis(
+    report_key: tuple,
+    load_base: Callable[[], ReportAnalysis],
+    zip_file,
+    folder_text: str,
+    profiler: AnyProfiler,
+) -> ReportAnalysis:
+    """The enriched analysis for the current inputs, kept in the session across reruns.
+
+    Widget interactions rerun the script; while the report, the artifacts and
+    the diagnostics settings are unchanged the same object (and so its cached
+    `analysis_view`) is reused instead of being reloaded, re-merged and re-indexed.
+    """
+    st.session_state["active_report_key"] = report_key
+    signature = _artifact_signature(zip_file, folder_text, report_key)
+    key = (report_key, signature, profiler.enabled, profiler.trace_memory)
+    memo = st.session_state.get("analysis_memo")
+    if memo is None or memo[0] != key:
+        with profiler:
+            analysis, parsed = _maybe_enrich_with_artifacts(load_base(), zip_file, folder_text, report_key, profiler)
+        if profiler.enabled:
+            analysis.diagnostics = profiler.to_dict()
+            profiler.emit(report=analysis.report_name)
+        memo = st.session_state["analysis_memo"] = (key, analysis, parsed)
+    _, analysis, parsed = memo
+    if parsed is not None:
+        _render_artifact_validation(parsed)
+    elif signature is not None and signature[0] == "missing":
+        st.warning("Artifact folder or .bim path not found. Continuing with semantic-only analysis.")
+    return analysis
 
 
 def main() -> None:
@@ -248,12 +464,16 @@ def main() -> None:
     st.caption("Upload PBIX, review logic summaries, and enrich with DAX artifacts when available.")
 
     root = repo_root_from_app()
-    demo_reports: Dict[str, ReportAnalysis] = load_demo_reports(root)
+    demo_reports: DemoCatalog = load_demo_catalog(root)
 
     with st.sidebar:
         st.header("Input")
         mode = st.radio("Choose source", ["Demo reports", "Upload PBIX"], index=0)
         _render_actions_handoff_panel()
+        with st.expander("Diagnostics"):
+            collect = st.checkbox("Collect diagnostics", value=False)
+            trace_memory = st.checkbox("Trace memory (slower)", value=False, disabled=not collect)
+        profiler: AnyProfiler = Profiler(trace_memory=trace_memory) if collect else NULL_PROFILER
 
         analysis: Optional[ReportAnalysis] = None
 
@@ -262,37 +482,56 @@ def main() -> None:
                 st.warning("No precomputed demo data found under out/powerbi-examples-all/report-query-logic.")
             else:
                 selected = st.selectbox("Demo report", sorted(demo_reports.keys()))
-                analysis = demo_reports[selected]
                 st.success(f"Loaded demo: {selected}")
                 _render_upload_help()
                 artifact_zip = st.file_uploader("Optional artifact ZIP (.dax/.bim)", type=["zip"])
-                artifact_folder = st.text_input("Optional artifact folder path", value="")
-                analysis = _maybe_enrich_with_artifacts(analysis, artifact_zip, artifact_folder)
+                artifact_folder = st.text_input("Optional artifact folder or .bim path", value="")
+                analysis = _session_analysis(
+                    ("demo", selected),
+                    # Demo reports are memoized process-wide; enrich a copy so the shared one stays pristine.
+                    lambda: _detached_copy(demo_reports[selected]),
+                    artifact_zip,
+                    artifact_folder,
+                    profiler,
+                )
 
         else:
             pbix_file = st.file_uploader("Upload PBIX", type=["pbix"])
             _render_upload_help()
             artifact_zip = st.file_uploader("Optional artifact ZIP (.dax/.bim)", type=["zip"], key="artifact_zip_upload")
-            artifact_folder = st.text_input("Optional artifact folder path", value="", key="artifact_folder_upload")
+            artifact_folder = st.text_input("Optional artifact folder or .bim path", value="", key="artifact_folder_upload")
 
             if pbix_file is not None:
                 try:
-                    analysis = analyze_pbix_bytes(pbix_file.name, pbix_file.getvalue())
-                    analysis = _maybe_enrich_with_artifacts(analysis, artifact_zip, artifact_folder)
+                    cache = _analysis_cache()
+                    analysis = _session_analysis(
+                        ("upload", pbix_file.name, pbix_file.size, getattr(pbix_file, "file_id", None)),
+                        # The upload is hashed and unzipped in place; getvalue() would copy the whole PBIX.
+                        lambda: analyze_pbix_cached(cache, pbix_file.name, pbix_file, profiler=profiler),
+                        artifact_zip,
+                        artifact_folder,
+                        profiler,
+                    )
                     st.success("PBIX analyzed successfully.")
+                    stats = cache.stats()
+                    st.caption(
+                        f"Analysis cache: hits={stats['hits']}, misses={stats['misses']}, "
+                        f"entries={stats['entries']}, size={stats['bytes'] / 1_000_000:.1f} MB"
+                    )
                 except Exception as exc:
                     st.error(f"Analysis failed: {exc}")
                     analysis = None
 
     if analysis is None:
+        st.session_state.pop("active_report_key", None)
         st.warning("Select a demo report or upload a PBIX file to begin.")
         return
-
+    view = analysis_view(analysis)
     _render_hybrid_status(analysis)
     _render_source_badges(analysis)
 
-    tab_summary, tab_measures, tab_drilldown, tab_downloads = st.tabs(
-        ["Executive Summary", "Measure Logic", "Section Drilldown", "Downloads"]
+    tab_summary, tab_measures, tab_drilldown, tab_corpus, tab_diagnostics, tab_downloads = st.tabs(
+        ["Executive Summary", "Measure Logic", "Section Drilldown", "Corpus Search", "Diagnostics", "Downloads"]
     )
 
     with tab_summary:
@@ -307,6 +546,7 @@ def main() -> None:
             {
                 "Section": s.section,
                 "Complexity Score": s.complexity_score,
+                "Rolled-up Cost": s.rolled_up_cost,
                 "Unique Refs": s.unique_refs,
             }
             for s in analysis.section_summaries[:25]
@@ -315,20 +555,40 @@ def main() -> None:
 
     with tab_measures:
         st.subheader("Measure Logic Overview")
-        df = _build_measure_table(analysis)
+        c1, c2 = st.columns([3, 1])
+        query = c1.text_input("Search measures", placeholder="word prefixes, e.g. 'sales ytd'")
+        page_size = c2.selectbox("Rows per page", [25, 50, 100, 200], index=1)
+        total = len(view.search_measures(query))
+        page_count = max(1, -(-total // page_size))
+        page = view.measure_page(query, _page_number("Page", page_count, "measure_page"), page_size)
+        st.caption(f"{page.total} of {len(view.ranked)} measure(s), ranked by complexity then usage.")
+        df = _build_measure_table(page.items)
         st.dataframe(df, use_container_width=True)
 
-        if not df.empty:
-            artifact_only = df[(df["Source"] == "dax") & (df["Usage Count"] == 0)]
-            if not artifact_only.empty:
-                st.subheader("Artifact-only measures (not matched in queryRef)")
-                st.dataframe(artifact_only, use_container_width=True)
-
-        selected_measure = st.selectbox("Inspect measure", df["Measure"].tolist() if not df.empty else [])
+        if analysis.dax_ambiguities:
+            st.warning(
+                f"{len(analysis.dax_ambiguities)} DAX name(s) matched more than one artifact and were not merged."
+            )
+            st.json(analysis.dax_ambiguities)
+
+        if analysis.dependency_cycles:
+            st.warning(f"{len(analysis.dependency_cycles)} circular measure dependency group(s) found.")
+            st.json(analysis.dependency_cycles)
+
+        if view.artifact_only:
+            st.subheader(f"Artifact-only measures (not matched in queryRef): {len(view.artifact_only)}")
+            artifact_pages = max(1, -(-len(view.artifact_only) // page_size))
+            artifact_page = view.artifact_only_page(
+                _page_number("Artifact-only page", artifact_pages, "artifact_only_page"), page_size
+            )
+            st.dataframe(_build_measure_table(artifact_page.items), use_container_width=True)
+
+        selected_measure = st.selectbox("Inspect measure", [m.name for m in page.items])
         if selected_measure:
             detail = analysis.measures[selected_measure]
             st.write(f"**Source:** `{detail.source}`")
             st.write(f"**Complexity score:** {detail.complexity_score}")
+            st.write(f"**Rolled-up cost:** {detail.rolled_up_cost} ({detail.fan_out} direct dependencies)")
             st.write(f"**Usage count:** {detail.usage_count}")
             st.write(f"**Sections:** {', '.join(detail.sections) if detail.sections else 'N/A'}")
             if detail.matched_tokens:
@@ -340,15 +600,41 @@ def main() -> None:
 
     with tab_drilldown:
         st.subheader("Visual / Section Drilldown")
-        section_names = sorted({q.get("section", "Unknown") for q in analysis.visual_queries})
-        selected_section = st.selectbox("Section", section_names)
-        section_queries = [q for q in analysis.visual_queries if q.get("section") == selected_section]
-        st.write(f"Visual query objects in section: **{len(section_queries)}**")
-        st.json(section_queries[:8])
+        selected_section = st.selectbox("Section", view.sections)
+        section_count = len(analysis.visual_queries.section_indices(selected_section)) if selected_section else 0
+        st.write(f"Visual query objects in section: **{section_count}**")
+        if analysis.visual_costs and selected_section:
+            indices = analysis.visual_queries.section_indices(selected_section)
+            costs = heapq.nlargest(10, ((analysis.visual_costs[i], i) for i in indices))
+            st.caption("Most expensive visuals (rolled-up cost of their measures)")
+            st.dataframe(
+                pd.DataFrame([{"Visual #": i, "Rolled-up Cost": cost} for cost, i in costs]),
+                use_container_width=True,
+            )
+        if selected_section:
+            visuals_per_page = 8
+            page_count = max(1, -(-section_count // visuals_per_page))
+            visual_page = view.visual_page(
+                selected_section, _page_number("Visual page", page_count, "visual_page"), visuals_per_page
+            )
+            # Only the displayed visuals are decoded from the compact store.
+            st.json({f"Visual #{i}": visual for i, visual in visual_page.items})
+
+        st.subheader("Semantic References by Section")
+        ref_counts = view.section_ref_counts()
+        if ref_counts:
+            by_section = pd.DataFrame.from_dict(ref_counts, orient="index").fillna(0).astype(int)
+            st.dataframe(by_section, use_container_width=True)
 
         st.subheader("Semantic References Sample")
         st.json(analysis.semantic_references[:60])
 
+    with tab_corpus:
+        _render_corpus_search(analysis)
+
+    with tab_diagnostics:
+        _render_diagnostics(analysis)
+
     with tab_downloads:
         summary_md = build_markdown_summary(analysis)
         summary_json = _analysis_to_json(analysis)
@@ -0,0 +1,27 @@
+import io
+import json
+
+from analyzer.bim import bim_object_name, parse_bim
+from analyzer.engine import _dax_key
+
+
+def test_bim_object_name_encodes_slash_like_the_extractor():
+    assert bim_object_name("Daily Sales", "measures", "w/ VA Adjustment") == (
+        "Model/tables/Daily Sales/measures/w%2F VA Adjustment"
+    )
+    assert bim_object_name("A/B", "table", "A/B") == "Model/tables/A%2FB/table"
+
+
+def test_bim_and_dax_file_keys_agree_for_slash_names():
+    model = {
+        "model": {
+            "tables": [
+                {"name": "Daily Sales", "measures": [{"name": "w/ VA Adjustment", "expression": "SUM(Sales[VA])"}]}
+            ]
+        }
+    }
+    measures = parse_bim(io.BytesIO(json.dumps(model).encode("utf-8")))
+    (name,) = measures
+    assert measures[name].dax_formula == "SUM(Sales[VA])"
+    assert _dax_key(name) == _dax_key("Model/tables/Daily Sales/measures/w%2F VA Adjustment")
+    assert _dax_key(name) == ("dailysales", "w/vaadjustment")
@@ -0,0 +1,25 @@
+import io
+import json
+import zipfile
+
+from analyzer.cache import AnalysisCache, analyze_pbix_cached
+
+
+def _pbix(measure: str) -> bytes:
+    config = {"singleVisual": {"prototypeQuery": {"Select": [{"Name": f"Sales.{measure}"}]}}}
+    layout = {"sections": [{"displayName": "Page 1", "visualContainers": [{"config": json.dumps(config)}]}]}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("Report/Layout", json.dumps(layout).encode("utf-16-le"))
+    return buffer.getvalue()
+
+
+def test_latest_pointer_lookups_do_not_count_as_hits_or_misses(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    analyze_pbix_cached(cache, "R.pbix", _pbix("Total"))
+    assert (cache.hits, cache.misses) == (0, 1)
+    analyze_pbix_cached(cache, "R.pbix", _pbix("Total"))
+    assert (cache.hits, cache.misses) == (1, 1)
+    # A changed report reuses the previous analysis through the pointer, uncounted.
+    analyze_pbix_cached(cache, "R.pbix", _pbix("Margin"))
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,22 @@
+from analyzer.columnar import VisualQueryStore
+from analyzer.corpus_index import CorpusIndex
+from analyzer.models import ReportAnalysis
+
+
+def _measure(table: str, name: str) -> dict:
+    return {"Measure": {"Expression": {"SourceRef": {"Entity": table}}, "Property": name}}
+
+
+def _report(name: str, *fields) -> ReportAnalysis:
+    visuals = [{"section": "Page 1", "query": {"Select": [_measure(t, n)]}} for t, n in fields]
+    store = VisualQueryStore.from_visuals(visuals)
+    return ReportAnalysis(report_name=name, source_mode="semantic_only", visual_queries=store)
+
+
+def test_search_matches_percent_and_underscore_literally(tmp_path):
+    with CorpusIndex(tmp_path / "index.sqlite3") as index:
+        index.index_report(_report("R", ("Sales", "Margin_%"), ("Sales", "MarginX Total"), ("Sales", "Margin 100")))
+        assert [row[2] for row in index.search("Margin_%")] == ["Margin_%"]
+        assert [row[2] for row in index.search("n_")] == ["Margin_%"]
+        assert sorted(row[2] for row in index.search("Margin")) == ["Margin 100", "MarginX Total", "Margin_%"]
+        assert index.search("%") == index.search("Margin_%")
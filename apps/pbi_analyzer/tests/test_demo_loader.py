@@ -0,0 +1,16 @@
+import json
+
+from analyzer.demo_loader import load_demo_catalog
+
+
+def test_catalog_skips_summary_entries_without_outputs(tmp_path):
+    base = tmp_path / "out" / "powerbi-examples-all" / "report-query-logic"
+    for name in ("Ready", "Failed"):
+        (base / name).mkdir(parents=True)
+    (base / "Ready" / "visual_queries.json").write_text("[]", encoding="utf-8")
+    summary = [{"report": f"{name}.pbix", "output": f"{base.as_posix()}/{name}"} for name in ("Ready", "Failed")]
+    (base / "summary.json").write_text(json.dumps(summary), encoding="utf-8")
+
+    catalog = load_demo_catalog(tmp_path)
+    assert list(catalog) == ["Ready"]
+    assert catalog.entry("Ready").summary["report"] == "Ready.pbix"
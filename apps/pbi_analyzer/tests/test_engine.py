@@ -0,0 +1,14 @@
+from analyzer.engine import _dax_key, build_dax_index
+from analyzer.models import MeasureDetail
+
+
+def test_dax_key_decodes_percent_encoded_segments():
+    assert _dax_key("Model/tables/Sales/measures/w%2F VA Adjustment") == ("sales", "w/vaadjustment")
+    assert _dax_key("Model/tables/Fact%3A Sales/measures/Margin") == ("fact:sales", "margin")
+
+
+def test_encoded_slash_measure_resolves_its_query_ref():
+    name = "legacy/Model/tables/Daily Sales/measures/w%2F VA Adjustment"
+    detail = MeasureDetail(name=name, source="dax", dax_formula="SUM(Sales[Amount])")
+    index = build_dax_index({name: detail})
+    assert index.resolve("Daily Sales.w/ VA Adjustment") is detail
@@ -0,0 +1,29 @@
+import email.message
+
+from analyzer.github_actions import GitHubClient, retry_after_seconds
+
+
+def _headers(**values) -> email.message.Message:
+    message = email.message.Message()
+    for name, value in values.items():
+        message[name.replace("_", "-")] = value
+    return message
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    now = 1_445_412_480.0  # Wed, 21 Oct 2015 07:28:00 GMT
+    assert retry_after_seconds("120", now=now) == 120.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:30 GMT", now=now) == 30.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:27:00 GMT", now=now) == 0.0
+    assert retry_after_seconds("soon", now=now) is None
+    assert retry_after_seconds("inf", now=now) is None
+
+
+def test_rate_limit_with_http_date_or_garbage_does_not_raise():
+    client = GitHubClient("token")
+    try:
+        assert client._retry_delay(429, _headers(Retry_After="Wed, 21 Oct 2015 07:28:00 GMT"), 0) == 0.0
+        assert client._retry_delay(429, _headers(Retry_After="later"), 2) == 2.0
+        assert client._retry_delay(403, _headers(X_RateLimit_Remaining="0", X_RateLimit_Reset="x"), 1) == 1.0
+    finally:
+        client.close()
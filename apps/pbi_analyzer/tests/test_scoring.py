@@ -0,0 +1,35 @@
+import random
+import re
+
+from analyzer.scoring import COMPLEXITY_TOKENS, ComplexityScorer, TokenRule
+
+
+def _reference(rules, name):
+    # One independent search per token: the behaviour the single compiled scan must reproduce.
+    lowered = name.lower()
+    matched = []
+    for rule in rules:
+        body = re.escape(rule.token)
+        if rule.resolved_boundary() == "word":
+            body = rf"(?<![0-9a-z]){body}(?![0-9a-z])"
+        if re.search(body, lowered) and rule.token not in matched:
+            matched.append(rule.token)
+    return matched
+
+
+def test_tokens_overlapping_at_one_offset_are_all_counted():
+    scorer = ComplexityScorer([TokenRule("budget"), TokenRule("budget var", weight=3), TokenRule("ly")])
+    assert scorer.score("Budget Variance LY") == (5, ["budget", "budget var", "ly"])
+    assert scorer.score("Budget Total") == (1, ["budget"])
+    assert scorer.score_many(["Budget Variance", "Daily Budget"]) == [(4, ["budget", "budget var"]), (1, ["budget"])]
+
+
+def test_single_scan_matches_per_token_search():
+    rules = [TokenRule(t) for t in COMPLEXITY_TOKENS + ["mt", "ytd ly", "budget var", "var"]]
+    scorer = ComplexityScorer(rules)
+    words = ["calc", "budget", "variance", "mtd", "ytd", "ly", "daily", "%", "last year", "index", "x"]
+    rng = random.Random(7)
+    names = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 5))) for _ in range(300)]
+    expected = [sorted(_reference(rules, n), key=[r.token for r in rules].index) for n in names]
+    assert [tokens for _, tokens in scorer.score_many(names)] == expected
+    assert [scorer.score(n)[1] for n in names] == expected